@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Bulk COPY Helper
+Shared COPY FROM STDIN loader for the import scripts.
+"""
+
+import csv
+import io
+
+# Written for None values; FORCE_NULL reads it back as NULL even though it is quoted
+NULL_MARKER = '\\N'
+
+def copy_rows(cursor, table_name, fields, rows):
+    """Bulk load row dicts into a table with COPY FROM STDIN; None values load as NULL"""
+    buffer = io.StringIO()
+    # Quote everything so empty strings are not read back as NULL
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    for row in rows:
+        values = [row.get(field, '') for field in fields]
+        writer.writerow([NULL_MARKER if value is None else value for value in values])
+    buffer.seek(0)
+
+    columns = ', '.join(fields)
+    cursor.copy_expert(
+        f"COPY {table_name} ({columns}) FROM STDIN "
+        f"WITH (FORMAT csv, NULL '{NULL_MARKER}', FORCE_NULL ({columns}))",
+        buffer
+    )
+    return len(rows)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Diagnosis Code Conflict Checker
+Scans claims.diagnosis_codes for pairs of codes that ICD-10-CM Excludes1 notes
+say cannot be reported together, using the rules loaded by import_full_icd10.py.
+"""
+
+import sys
+import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+import argparse
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'claims_db',
+    'user': 'claims_user',
+    'password': 'claims_password',
+    'port': 5432
+}
+
+# Claim codes may be stored without the dot ("E119"); rules always have it
+NORMALIZED_CODE_SQL = """
+    CASE WHEN length(c) > 3 AND position('.' in c) = 0
+         THEN left(c, 3) || '.' || substr(c, 4) ELSE c END
+"""
+
+def create_tables(cursor):
+    """Create the conflict results table"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS claim_code_conflicts (
+            claim_id INTEGER NOT NULL REFERENCES claims(id),
+            code VARCHAR(20) NOT NULL,
+            conflicting_code VARCHAR(20) NOT NULL,
+            rule_type VARCHAR(20) NOT NULL,
+            detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (claim_id, code, conflicting_code, rule_type)
+        );
+    """)
+
+# Conflicting pairs between the codes of {claim_codes} (claim_id, code) under the
+# (code, related_code) pairs of {rules}. Ancestors come from each claim code's own
+# prefixes, since 7th-character codes (S72.001A) are never in the tabular file.
+CONFLICTS_SQL = """
+    WITH claim_codes AS ({claim_codes}),
+    claim_ancestors AS (
+        SELECT cc.claim_id, cc.code,
+               CASE WHEN len > 3 THEN left(u, 3) || '.' || substr(u, 4, len - 3) ELSE left(u, 3) END AS ancestor
+        FROM claim_codes cc,
+             LATERAL (SELECT replace(cc.code, '.', '') AS u) AS p,
+             generate_series(3, length(p.u)) AS len
+    )
+    SELECT DISTINCT a.claim_id, LEAST(a.code, b.code) AS code, GREATEST(a.code, b.code) AS conflicting_code
+    FROM claim_ancestors a
+    JOIN ({rules}) AS r (code, related_code) ON r.code = a.ancestor
+    JOIN claim_ancestors b ON b.claim_id = a.claim_id AND b.ancestor = r.related_code
+    WHERE a.code <> b.code
+"""
+
+# Known-conflicting claims for --self-check; the rules stand in for loaded Excludes1 pairs
+SELF_CHECK_RULES = [('E10', 'E11'), ('E11', 'E10'), ('T38.3', 'E16.0')]
+SELF_CHECK_CLAIMS = [
+    (1, ['E10.9', 'E11.9']),
+    (2, ['T38.3X1A', 'E16.0']),
+    (3, ['E119', 'I10', 'E109']),
+    (4, ['S72.001A', 'I10']),
+]
+SELF_CHECK_EXPECTED = {
+    (1, 'E10.9', 'E11.9'),
+    (2, 'E16.0', 'T38.3X1A'),
+    (3, 'E10.9', 'E11.9'),
+}
+
+def normalize_code(code):
+    code = code.strip().upper()
+    if len(code) > 3 and '.' not in code:
+        code = f"{code[:3]}.{code[3:]}"
+    return code
+
+def code_ancestors(code):
+    """A dotted code and every shorter prefix of it: T38.3X1A -> T38, T38.3, ..., T38.3X1A"""
+    undotted = code.replace('.', '')
+    return [normalize_code(undotted[:length]) for length in range(3, len(undotted) + 1)]
+
+def clear_conflicts(cursor, rule_type, since_id):
+    """Drop earlier results for the claims being rescanned so fixed claims and reloaded rules take effect"""
+    cursor.execute("DELETE FROM claim_code_conflicts WHERE rule_type = %s AND claim_id > %s",
+                   (rule_type, since_id))
+    return cursor.rowcount
+
+def check_sql(cursor, rule_type, since_id):
+    """Find conflicts with one set-based query over every claim"""
+    claim_codes = f"""
+        SELECT DISTINCT cl.id AS claim_id, {NORMALIZED_CODE_SQL} AS code
+        FROM claims cl, unnest(cl.diagnosis_codes) AS raw_code,
+             LATERAL (SELECT UPPER(TRIM(raw_code)) AS c) AS n
+        WHERE cl.id > %(since_id)s AND array_length(cl.diagnosis_codes, 1) > 1
+    """
+    rules = "SELECT code, related_code FROM icd10_code_rules WHERE rule_type = %(rule_type)s"
+    cursor.execute(f"""
+        INSERT INTO claim_code_conflicts (claim_id, code, conflicting_code, rule_type)
+        SELECT claim_id, code, conflicting_code, %(rule_type)s
+        FROM ({CONFLICTS_SQL.format(claim_codes=claim_codes, rules=rules)}) AS found
+        ON CONFLICT DO NOTHING
+    """, {'since_id': since_id, 'rule_type': rule_type})
+    return cursor.rowcount
+
+def load_rules(cursor, rule_type):
+    """Rule lookups keyed by code"""
+    cursor.execute("SELECT code, related_code FROM icd10_code_rules WHERE rule_type = %s", (rule_type,))
+    rules = {}
+    for row in cursor.fetchall():
+        rules.setdefault(row['code'], set()).add(row['related_code'])
+
+    print(f"📚 Loaded {sum(len(v) for v in rules.values()):,} {rule_type} pairs for {len(rules):,} codes")
+    return rules
+
+def claim_conflicts(codes, rules):
+    """Conflicting (code, code) pairs among one claim's diagnosis codes"""
+    conflicts = set()
+    expanded = [(code, code_ancestors(code)) for code in codes]
+    for code, own_ancestors in expanded:
+        related = set()
+        for ancestor in own_ancestors:
+            related |= rules.get(ancestor, set())
+        if not related:
+            continue
+        for other, other_ancestors in expanded:
+            if other != code and not related.isdisjoint(other_ancestors):
+                conflicts.add((min(code, other), max(code, other)))
+    return conflicts
+
+def check_memory(conn, cursor, rule_type, since_id, batch_size):
+    """Stream claims through in-memory hash lookups and write conflicts in batches"""
+    rules = load_rules(cursor, rule_type)
+
+    scan = conn.cursor(name='diagnosis_conflict_scan')
+    scan.itersize = batch_size
+    scan.execute("""
+        SELECT id, diagnosis_codes FROM claims
+        WHERE id > %s AND array_length(diagnosis_codes, 1) > 1
+        ORDER BY id
+    """, (since_id,))
+
+    found = 0
+    scanned = 0
+    pending = []
+    for claim_id, diagnosis_codes in scan:
+        scanned += 1
+        codes = {normalize_code(code) for code in diagnosis_codes if code and code.strip()}
+        for code, other in claim_conflicts(codes, rules):
+            pending.append((claim_id, code, other, rule_type))
+
+        if len(pending) >= batch_size:
+            found += write_conflicts(cursor, pending)
+            pending = []
+    found += write_conflicts(cursor, pending)
+    scan.close()
+
+    print(f"🔍 Scanned {scanned:,} multi-code claims")
+    return found
+
+def self_check(cursor):
+    """Run both modes over SELF_CHECK_CLAIMS and compare with the expected conflicts"""
+    rules = {}
+    for code, related_code in SELF_CHECK_RULES:
+        rules.setdefault(code, set()).add(related_code)
+    memory_found = {
+        (claim_id, code, other)
+        for claim_id, codes in SELF_CHECK_CLAIMS
+        for code, other in claim_conflicts({normalize_code(code) for code in codes}, rules)
+    }
+
+    claim_codes = f"""
+        SELECT DISTINCT claim_id, {NORMALIZED_CODE_SQL} AS code
+        FROM (VALUES {', '.join(['(%s, %s)'] * sum(len(codes) for _, codes in SELF_CHECK_CLAIMS))})
+             AS v (claim_id, raw_code),
+             LATERAL (SELECT UPPER(TRIM(raw_code)) AS c) AS n
+    """
+    rules_sql = f"VALUES {', '.join(['(%s, %s)'] * len(SELF_CHECK_RULES))}"
+    claim_params = [value for claim_id, codes in SELF_CHECK_CLAIMS for code in codes for value in (claim_id, code)]
+    rule_params = [value for pair in SELF_CHECK_RULES for value in pair]
+    cursor.execute(
+        CONFLICTS_SQL.format(claim_codes=claim_codes, rules=rules_sql),
+        claim_params + rule_params
+    )
+    sql_found = {(row['claim_id'], row['code'], row['conflicting_code']) for row in cursor.fetchall()}
+
+    ok = True
+    for mode, found in (('memory', memory_found), ('sql', sql_found)):
+        status = "✅" if found == SELF_CHECK_EXPECTED else "❌"
+        print(f"   {status} {mode}: {len(found)} of {len(SELF_CHECK_EXPECTED)} expected conflicts")
+        for missing in sorted(SELF_CHECK_EXPECTED - found):
+            print(f"      missing {missing}")
+        for extra in sorted(found - SELF_CHECK_EXPECTED):
+            print(f"      unexpected {extra}")
+        ok = ok and found == SELF_CHECK_EXPECTED
+    return ok
+
+def write_conflicts(cursor, rows):
+    if not rows:
+        return 0
+    execute_values(cursor, """
+        INSERT INTO claim_code_conflicts (claim_id, code, conflicting_code, rule_type)
+        VALUES %s ON CONFLICT DO NOTHING
+    """, rows)
+    return cursor.rowcount
+
+def main():
+    parser = argparse.ArgumentParser(description='Check claims for mutually exclusive diagnosis codes')
+    parser.add_argument('--mode', choices=['sql', 'memory'], default='sql',
+                        help='Set-based SQL in the database, or in-memory hash lookups in this process')
+    parser.add_argument('--rule-type', default='excludes1', help='Code rule type to check')
+    parser.add_argument('--since-id', type=int, default=0, help='Only check claims with a higher id')
+    parser.add_argument('--batch-size', type=int, default=50000, help='Claims fetched per round trip in memory mode')
+    parser.add_argument('--self-check', action='store_true',
+                        help='Check both modes against known-conflicting claims without touching claim data')
+
+    args = parser.parse_args()
+
+    print("🩺 Diagnosis Code Conflict Checker")
+    print("=" * 35)
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        print("✅ Connected to PostgreSQL database")
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+        sys.exit(1)
+
+    if args.self_check:
+        try:
+            ok = self_check(cursor)
+        finally:
+            cursor.close()
+            conn.close()
+        if not ok:
+            sys.exit(1)
+        print("\n✅ Self-check passed!")
+        return
+
+    try:
+        create_tables(cursor)
+        # Same transaction as the new results, which replace these on commit
+        cleared = clear_conflicts(cursor, args.rule_type, args.since_id)
+
+        if args.mode == 'sql':
+            found = check_sql(cursor, args.rule_type, args.since_id)
+        else:
+            found = check_memory(conn, cursor, args.rule_type, args.since_id, args.batch_size)
+        conn.commit()
+
+        cursor.execute("SELECT COUNT(DISTINCT claim_id) AS claims FROM claim_code_conflicts WHERE rule_type = %s",
+                       (args.rule_type,))
+        print(f"\n📊 {args.rule_type} conflicts: {found:,} (replacing {cleared:,})")
+        print(f"   Claims with conflicts: {cursor.fetchone()['claims']:,}")
+        print("\n✅ Conflict check completed!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Conflict check failed: {e}")
+        sys.exit(1)
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Code Set Change Notifications
+Records a new code-set version after an importer load and announces it with
+PostgreSQL NOTIFY and, optionally, on the claims.events RabbitMQ exchange so
+services can keep code caches warm and invalidate exactly what changed.
+"""
+
+import sys
+import json
+import select
+import argparse
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+
+try:
+    import pika
+except ImportError:
+    pika = None
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'claims_db',
+    'user': 'claims_user',
+    'password': 'claims_password',
+    'port': 5432
+}
+
+NOTIFY_CHANNEL = 'code_set_changed'
+EXCHANGE_NAME = 'claims.events'
+ROUTING_KEY = 'codes.updated'
+
+# Lookup tables whose rows services cache
+CODE_SET_TABLES = [
+    'icd10_diagnosis_codes',
+    'icd10_procedure_codes',
+    'cpt_procedure_codes',
+]
+
+def create_tables(cursor):
+    """Create code-set version and change log tables"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS code_set_versions (
+            version SERIAL PRIMARY KEY,
+            source VARCHAR(100) NOT NULL,
+            changed_codes INTEGER NOT NULL DEFAULT 0,
+            published_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS code_set_changes (
+            version INTEGER NOT NULL REFERENCES code_set_versions(version),
+            table_name VARCHAR(100) NOT NULL,
+            code VARCHAR(20) NOT NULL,
+            change_type VARCHAR(10) NOT NULL,
+            PRIMARY KEY (version, table_name, code)
+        );
+    """)
+
+def fetch_code_state(cursor, tables=CODE_SET_TABLES):
+    """Row fingerprint per code for each existing table, to diff after a load"""
+    state = {}
+    for table_name in tables:
+        cursor.execute("SELECT to_regclass(%s) AS oid", (table_name,))
+        if cursor.fetchone()['oid'] is None:
+            state[table_name] = {}
+            continue
+        # Bookkeeping columns are left out so only content changes count; nulls are
+        # stripped so a column added by a later importer does not change every row
+        cursor.execute(f"""
+            SELECT code, md5(jsonb_strip_nulls(to_jsonb(t) - 'id' - 'created_at' - 'usage_count')::text) AS fingerprint
+            FROM {table_name} t
+        """)
+        state[table_name] = {row['code']: row['fingerprint'] for row in cursor.fetchall()}
+    return state
+
+def diff_code_state(before, after):
+    """Added, updated and removed codes per table"""
+    delta = {}
+    for table_name, after_codes in after.items():
+        before_codes = before.get(table_name, {})
+        changes = {
+            'added': sorted(code for code in after_codes if code not in before_codes),
+            'updated': sorted(code for code, fingerprint in after_codes.items()
+                              if code in before_codes and before_codes[code] != fingerprint),
+            'removed': sorted(code for code in before_codes if code not in after_codes),
+        }
+        if any(changes.values()):
+            delta[table_name] = changes
+    return delta
+
+class LocalBroker:
+    """Stand-in broker that appends each message as a JSON line to a file"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def publish(self, routing_key, message):
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'exchange': EXCHANGE_NAME, 'routingKey': routing_key, 'message': message}) + '\n')
+
+    def close(self):
+        pass
+
+class RabbitMQBroker:
+    """Publishes to the topic exchange RabbitMQPublisher declares in the claims processor"""
+
+    def __init__(self, url):
+        if pika is None:
+            raise RuntimeError("pika is not installed; install it to publish to RabbitMQ")
+        self.connection = pika.BlockingConnection(pika.URLParameters(url))
+        self.channel = self.connection.channel()
+        self.channel.exchange_declare(exchange=EXCHANGE_NAME, exchange_type='topic', durable=True)
+
+    def publish(self, routing_key, message):
+        self.channel.basic_publish(
+            exchange=EXCHANGE_NAME,
+            routing_key=routing_key,
+            body=json.dumps(message).encode('utf-8'),
+            properties=pika.BasicProperties(
+                content_type='application/json',
+                delivery_mode=2,
+                timestamp=int(datetime.now(timezone.utc).timestamp())
+            )
+        )
+
+    def close(self):
+        self.connection.close()
+
+def open_broker(url):
+    """file:// URLs write to a local JSON lines file; anything else is AMQP"""
+    if url.startswith('file://'):
+        return LocalBroker(urlparse(url).path)
+    return RabbitMQBroker(url)
+
+def publish_code_set_change(cursor, source, before, broker_url=None):
+    """Record a new code-set version for the rows changed since `before` and announce it"""
+    create_tables(cursor)
+    delta = diff_code_state(before, fetch_code_state(cursor, list(before)))
+    changed = sum(len(codes) for changes in delta.values() for codes in changes.values())
+
+    if not changed:
+        print("ℹ️  Code set unchanged, no notification sent")
+        return None
+
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("""
+            INSERT INTO code_set_versions (source, changed_codes)
+            VALUES (%s, %s) RETURNING version, published_at
+        """, (source, changed))
+        row = cursor.fetchone()
+        version = row['version']
+
+        for table_name, changes in delta.items():
+            for change_type, codes in changes.items():
+                execute_values(cursor, """
+                    INSERT INTO code_set_changes (version, table_name, code, change_type)
+                    VALUES %s
+                """, [(version, table_name, code, change_type) for code in codes])
+
+        # NOTIFY payloads are capped at 8000 bytes; listeners read the delta from code_set_changes
+        payload = {'version': version, 'source': source, 'changedCodes': changed, 'tables': sorted(delta)}
+        cursor.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, json.dumps(payload)))
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+
+    print(f"📣 Published code set version {version} ({changed:,} changed codes)")
+
+    if broker_url:
+        message = {
+            'eventType': ROUTING_KEY,
+            'version': version,
+            'source': source,
+            'changes': delta,
+            'timestamp': row['published_at'].isoformat()
+        }
+        try:
+            broker = open_broker(broker_url)
+            try:
+                broker.publish(ROUTING_KEY, message)
+            finally:
+                broker.close()
+            print(f"📨 Sent {ROUTING_KEY} to {EXCHANGE_NAME}")
+        except Exception as e:
+            # The version is committed; consumers still see it through NOTIFY
+            print(f"⚠️  Failed to publish to message broker: {e}")
+
+    return version
+
+def main():
+    parser = argparse.ArgumentParser(description='Listen for code set change notifications')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds to wait between polls')
+
+    args = parser.parse_args()
+
+    print("📡 Code Set Change Listener")
+    print("=" * 35)
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        conn.autocommit = True
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        print("✅ Connected to PostgreSQL database")
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+        sys.exit(1)
+
+    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+    print(f"👂 Listening on {NOTIFY_CHANNEL} (Ctrl+C to stop)")
+    try:
+        while True:
+            if select.select([conn], [], [], args.timeout) == ([], [], []):
+                continue
+            conn.poll()
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                print(f"   {notify.payload}")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
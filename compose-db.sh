@@ -45,7 +45,9 @@ show_usage() {
     echo "  backup    Create database backup"
     echo "  restore   Restore database from backup"
     echo "  reset     Reset database (WARNING: destroys all data)"
-    echo "  import    Import medical codes"
+    echo "  import    Import medical codes (restores the latest local or published snapshot)"
+    echo "  snapshot  Save loaded medical code tables as a versioned snapshot"
+    echo "  publish   Upload the latest snapshot to \$CODE_SNAPSHOT_URL for other environments"
     echo "  health    Check database health"
     echo ""
     echo "Examples:"
@@ -53,6 +55,10 @@ show_usage() {
     echo "  $0 logs -f             # Follow database logs"
     echo "  $0 connect             # Connect to psql"
     echo "  $0 backup mybackup     # Create backup named 'mybackup'"
+    echo "  $0 import --fresh      # Re-run importers even if a snapshot exists"
+    echo ""
+    echo "Snapshots live in \$CODE_SNAPSHOT_DIR (default ./snapshots) and are shared through"
+    echo "\$CODE_SNAPSHOT_URL (directory, file:// or http(s):// URL; also read from .env)"
 }
 
 # Configuration
@@ -62,6 +68,9 @@ DB_NAME="claims_db"
 DB_USER="claims_user"
 DB_PASSWORD="claims_password"
 BACKUP_DIR="./backups"
+SNAPSHOT_DIR="${CODE_SNAPSHOT_DIR:-./snapshots}"
+CODE_SNAPSHOT_URL="${CODE_SNAPSHOT_URL:-$(grep -s '^CODE_SNAPSHOT_URL=' .env | cut -d= -f2-)}"
+export CODE_SNAPSHOT_URL
 
 # Check if Docker and Docker Compose are available
 check_dependencies() {
@@ -205,16 +214,43 @@ reset_db() {
 
 # Import medical codes
 import_codes() {
+    if [ "$2" != "--fresh" ] && { [ -f "$SNAPSHOT_DIR/LATEST" ] || [ -n "$CODE_SNAPSHOT_URL" ]; }; then
+        print_status "Restoring medical codes snapshot if code tables are empty..."
+        if python3 snapshot_codes.py restore --snapshot-dir "$SNAPSHOT_DIR" --if-empty; then
+            print_success "Medical codes ready (use '$0 import --fresh' to re-run importers)"
+            return
+        fi
+        print_warning "Snapshot restore failed, running importers instead"
+    fi
+
     print_status "Importing medical codes..."
     
     if [ -f "import_basic_codes.py" ]; then
-        python3 import_basic_codes.py
+        python3 import_basic_codes.py --snapshot-dir "$SNAPSHOT_DIR"
         print_success "Basic medical codes imported"
     else
         print_warning "import_basic_codes.py not found, skipping"
     fi
 }
 
+# Snapshot medical code tables
+snapshot_codes() {
+    print_status "Creating medical codes snapshot..."
+    python3 snapshot_codes.py create --snapshot-dir "$SNAPSHOT_DIR"
+    print_success "Snapshot saved under $SNAPSHOT_DIR"
+}
+
+# Publish the latest snapshot to the shared location
+publish_snapshot() {
+    if [ -z "$CODE_SNAPSHOT_URL" ]; then
+        print_error "Set CODE_SNAPSHOT_URL (environment or .env) to publish snapshots"
+        exit 1
+    fi
+    print_status "Publishing medical codes snapshot to $CODE_SNAPSHOT_URL..."
+    python3 snapshot_codes.py publish --snapshot-dir "$SNAPSHOT_DIR"
+    print_success "Snapshot published"
+}
+
 # Check database health
 check_health() {
     print_status "Checking database health..."
@@ -289,7 +325,13 @@ case "${1:-start}" in
         reset_db
         ;;
     import)
-        import_codes
+        import_codes "$@"
+        ;;
+    snapshot)
+        snapshot_codes
+        ;;
+    publish)
+        publish_snapshot
         ;;
     health)
         check_health
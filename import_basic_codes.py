@@ -6,6 +6,11 @@ Adds essential ICD-10 and CPT codes that are commonly used in healthcare claims
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
+import argparse
+from snapshot_codes import create_snapshot
+from code_set_notify import fetch_code_state, publish_code_set_change
+from normalize_codes import (CPT_CODE_PATTERN, normalize_diagnosis_batch, normalize_procedure_batch,
+                             reconcile_undotted_codes)
 
 # Database connection 
 DB_CONFIG = {
@@ -44,6 +49,16 @@ def create_tables(cursor):
         CREATE INDEX IF NOT EXISTS idx_cpt_category ON cpt_procedure_codes(category);
     """)
     
+    # Popularity column maintained by refresh_code_usage.py, used to rank search results;
+    # billable flag derived by normalize_codes.py
+    cursor.execute("""
+        ALTER TABLE icd10_diagnosis_codes ADD COLUMN IF NOT EXISTS usage_count BIGINT NOT NULL DEFAULT 0;
+        ALTER TABLE cpt_procedure_codes ADD COLUMN IF NOT EXISTS usage_count BIGINT NOT NULL DEFAULT 0;
+        ALTER TABLE icd10_diagnosis_codes ADD COLUMN IF NOT EXISTS is_billable BOOLEAN;
+        CREATE INDEX IF NOT EXISTS idx_icd10_diagnosis_codes_usage ON icd10_diagnosis_codes(usage_count DESC, code);
+        CREATE INDEX IF NOT EXISTS idx_cpt_procedure_codes_usage ON cpt_procedure_codes(usage_count DESC, code);
+    """)
+    
     print("✅ Created medical code tables")
 
 def insert_common_diagnosis_codes(cursor):
@@ -84,14 +99,20 @@ def insert_common_diagnosis_codes(cursor):
         ('Z71.3', 'Dietary counseling and surveillance', 'Preventive', 'Z71')
     ]
     
-    for code, description, chapter, category in diagnosis_codes:
+    diagnosis_codes, _ = normalize_diagnosis_batch(
+        [{'code': code, 'description': description, 'chapter_name': chapter, 'category': category}
+         for code, description, chapter, category in diagnosis_codes]
+    )
+    
+    for code_data in diagnosis_codes:
         cursor.execute("""
-            INSERT INTO icd10_diagnosis_codes (code, description, chapter_name, category)
-            VALUES (%s, %s, %s, %s)
+            INSERT INTO icd10_diagnosis_codes (code, description, chapter_name, category, is_billable)
+            VALUES (%(code)s, %(description)s, %(chapter_name)s, %(category)s, %(is_billable)s)
             ON CONFLICT (code) DO UPDATE SET 
             description = EXCLUDED.description,
-            chapter_name = EXCLUDED.chapter_name
-        """, (code, description, chapter, category))
+            chapter_name = EXCLUDED.chapter_name,
+            is_billable = EXCLUDED.is_billable
+        """, code_data)
     
     print(f"✅ Inserted {len(diagnosis_codes)} ICD-10-CM diagnosis codes")
 
@@ -154,18 +175,31 @@ def insert_common_procedure_codes(cursor):
         ('90707', 'MMR vaccine', 'Immunizations')
     ]
     
-    for code, description, category in procedure_codes:
+    procedure_codes, _ = normalize_procedure_batch(
+        [{'code': code, 'description': description, 'category': category}
+         for code, description, category in procedure_codes],
+        CPT_CODE_PATTERN, 'CPT normalization'
+    )
+    
+    for code_data in procedure_codes:
         cursor.execute("""
             INSERT INTO cpt_procedure_codes (code, description, category)
-            VALUES (%s, %s, %s)
+            VALUES (%(code)s, %(description)s, %(category)s)
             ON CONFLICT (code) DO UPDATE SET
             description = EXCLUDED.description,
             category = EXCLUDED.category
-        """, (code, description, category))
+        """, code_data)
     
     print(f"✅ Inserted {len(procedure_codes)} CPT procedure codes")
 
 def main():
+    parser = argparse.ArgumentParser(description='Import essential ICD-10 and CPT codes')
+    parser.add_argument('--notify-broker',
+                        help='Also announce the code set change on RabbitMQ (amqp:// URL, or file:// for a local stand-in)')
+    parser.add_argument('--snapshot-dir', help='Write a versioned snapshot of the code tables here after loading')
+    
+    args = parser.parse_args()
+    
     print("🏥 Basic Medical Codes Import")
     print("=" * 35)
     
@@ -183,8 +217,12 @@ def main():
         # Create tables
         create_tables(cursor)
         
+        # Taken after the schema changes so added columns do not count as updates
+        code_state = fetch_code_state(cursor)
+        
         # Insert codes
         insert_common_diagnosis_codes(cursor)
+        reconcile_undotted_codes(cursor)
         insert_common_procedure_codes(cursor)
         
         # Get counts
@@ -199,6 +237,11 @@ def main():
         print(f"   CPT Procedure Codes: {proc_count:,}")
         print(f"   Total Medical Codes: {diag_count + proc_count:,}")
         
+        publish_code_set_change(cursor, 'import_basic_codes', code_state, args.notify_broker)
+        
+        if args.snapshot_dir:
+            create_snapshot(cursor, args.snapshot_dir, source='import_basic_codes')
+        
         print("\n✅ Basic medical codes imported successfully!")
         
     except Exception as e:
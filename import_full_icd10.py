@@ -11,6 +11,14 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 import argparse
 import re
+import time
+from snapshot_codes import create_snapshot
+from code_set_notify import fetch_code_state, publish_code_set_change
+from normalize_codes import (DIAGNOSIS_CODE_PATTERN, normalize_diagnosis_batch, normalize_procedure_batch,
+                             reconcile_undotted_codes)
+from bulk_copy import copy_rows
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
 
 DB_CONFIG = {
     'host': 'localhost',
@@ -20,6 +28,14 @@ DB_CONFIG = {
     'port': 5432
 }
 
+# Tabular note elements loaded into icd10_code_rules
+CODE_RULE_TYPES = ['excludes1', 'excludes2', 'codeFirst', 'useAdditionalCode']
+
+NOTE_CODE_PATTERN = re.compile(
+    r'([A-Z][0-9][0-9A-Z](?:\.[0-9A-Z]*)?)'
+    r'(?:\s*-\s*([A-Z][0-9][0-9A-Z](?:\.[0-9A-Z]*)?))?-?'
+)
+
 def parse_icd10cm_xml(xml_file):
     """Parse ICD-10-CM diagnosis codes from CMS XML format"""
     print(f"📋 Parsing ICD-10-CM file: {xml_file}")
@@ -31,6 +47,12 @@ def parse_icd10cm_xml(xml_file):
         diagnosis_codes = []
         current_chapter = "Unknown Chapter"
         
+        # Codes under a sevenChrDef, on the diag itself or an ancestor, need a 7th character
+        seventh_character_diags = {
+            diag for parent in root.iter('diag') if parent.find('sevenChrDef') is not None
+            for diag in parent.iter('diag')
+        }
+        
         # Navigate through the XML structure
         for element in root.iter():
             # Track current chapter
@@ -49,13 +71,30 @@ def parse_icd10cm_xml(xml_file):
                 desc_elem = element.find('desc')
                 description = desc_elem.text.strip() if desc_elem is not None else 'No description'
                 
-                # Validate ICD-10 code format
-                if code and len(code) >= 3 and re.match(r'^[A-Z][0-9][0-9A-Z]', code):
+                # Inclusion terms are alternate names people search by
+                inclusion_terms = [
+                    note.text.strip() for note in element.findall('inclusionTerm/note')
+                    if note.text and note.text.strip()
+                ]
+                
+                # Excludes / code-first notes, expanded once all codes are known
+                rule_notes = [
+                    (rule_type, note.text.strip())
+                    for rule_type in CODE_RULE_TYPES
+                    for note in element.findall(f'{rule_type}/note')
+                    if note.text and note.text.strip()
+                ]
+                
+                # Format is validated for the whole batch in normalize_codes
+                if code:
                     diagnosis_codes.append({
                         'code': code,
                         'description': description,
                         'chapter_name': current_chapter[:255],
-                        'category': code[:3]
+                        'category': code[:3],
+                        'requires_seventh_character': element in seventh_character_diags,
+                        'inclusion_terms': inclusion_terms,
+                        'rule_notes': rule_notes
                     })
         
         print(f"📊 Parsed {len(diagnosis_codes)} ICD-10-CM diagnosis codes")
@@ -65,6 +104,236 @@ def parse_icd10cm_xml(xml_file):
         print(f"❌ Error parsing ICD-10-CM XML: {e}")
         return []
 
+def normalize_term(text):
+    """Lowercase a search term and reduce it to space-separated words"""
+    return ' '.join(re.sub(r'[^0-9a-z]+', ' ', text.lower()).split())
+
+def index_title(element):
+    """Title text of an index entry without its nonessential modifiers"""
+    title = element.find('title')
+    if title is None:
+        return ''
+    parts = [title.text or '']
+    for child in title:
+        if child.tag != 'nemod':
+            parts.append(''.join(child.itertext()))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+def index_code(element):
+    """Code referenced by an index entry, with incomplete-code dashes removed"""
+    code_elem = element.find('code')
+    if code_elem is None or not code_elem.text:
+        return None
+    code = code_elem.text.strip().upper().rstrip('-').rstrip('.')
+    return code if DIAGNOSIS_CODE_PATTERN.fullmatch(code) else None
+
+def parse_icd10cm_index_xml(xml_file):
+    """Parse ICD-10-CM Alphabetic Index entries into (term, code) pairs"""
+    print(f"🔤 Parsing ICD-10-CM index file: {xml_file}")
+    
+    try:
+        tree = ET.parse(xml_file)
+        root = tree.getroot()
+        
+        index_terms = []
+        
+        def walk(entry, path):
+            path = path + [normalize_term(index_title(entry))]
+            code = index_code(entry)
+            if code:
+                # "Attack > heart" is typed as both "attack heart" and "heart attack"
+                for words in (path, path[::-1]):
+                    term = ' '.join(word for word in words if word)
+                    if term:
+                        index_terms.append({'term': term, 'code': code, 'source': 'index'})
+            for child in entry.findall('term'):
+                walk(child, path)
+        
+        for main_term in root.iter('mainTerm'):
+            walk(main_term, [])
+        
+        print(f"📊 Parsed {len(index_terms)} ICD-10-CM index terms")
+        return index_terms
+        
+    except Exception as e:
+        print(f"❌ Error parsing ICD-10-CM index XML: {e}")
+        return []
+
+def inclusion_term_rows(diagnosis_codes):
+    """Term index rows for the tabular inclusion terms"""
+    rows = []
+    for code_data in diagnosis_codes:
+        for note in code_data.get('inclusion_terms', []):
+            term = normalize_term(note)
+            if term:
+                rows.append({'term': term, 'code': code_data['code'], 'source': 'inclusion'})
+    return rows
+
+def load_term_index(cursor, term_rows):
+    """Replace the term index for the given sources in one bulk transaction"""
+    if not term_rows:
+        return 0
+    
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS icd10_term_index (
+            term TEXT NOT NULL,
+            code VARCHAR(10) NOT NULL,
+            source VARCHAR(20) NOT NULL,
+            PRIMARY KEY (term, code, source)
+        );
+        CREATE INDEX IF NOT EXISTS idx_icd10_term_prefix ON icd10_term_index(term text_pattern_ops);
+        CREATE INDEX IF NOT EXISTS idx_icd10_term_code ON icd10_term_index(code);
+    """)
+    
+    sources = sorted({row['source'] for row in term_rows})
+    print(f"💾 Loading {len(term_rows)} terms ({', '.join(sources)}) into icd10_term_index...")
+    
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("""
+            CREATE TEMP TABLE term_index_load (
+                term TEXT, code VARCHAR(10), source VARCHAR(20)
+            ) ON COMMIT DROP
+        """)
+        copy_rows(cursor, 'term_index_load', ['term', 'code', 'source'], term_rows)
+        
+        cursor.execute("DELETE FROM icd10_term_index WHERE source = ANY(%s)", (sources,))
+        # Only keep terms that point at a loaded code
+        cursor.execute("""
+            INSERT INTO icd10_term_index (term, code, source)
+            SELECT DISTINCT l.term, l.code, l.source
+            FROM term_index_load l
+            JOIN icd10_diagnosis_codes d ON d.code = l.code
+            ON CONFLICT DO NOTHING
+        """)
+        loaded = cursor.rowcount
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    
+    print(f"✅ Indexed {loaded} term → code entries")
+    return loaded
+
+def dotted_code(undotted):
+    """Format an undotted diagnosis code with its dot after the category"""
+    return undotted if len(undotted) <= 3 else f"{undotted[:3]}.{undotted[3:]}"
+
+def code_hierarchy_rows(codes):
+    """(code, ancestor) rows for every loaded code and its loaded ancestors, itself included"""
+    rows = []
+    for code in codes:
+        undotted = code.replace('.', '')
+        for length in range(3, len(undotted) + 1):
+            ancestor = dotted_code(undotted[:length])
+            if ancestor in codes:
+                rows.append({'code': code, 'ancestor': ancestor})
+    return rows
+
+def resolve_prefix(prefix, sorted_codes):
+    """Top-most loaded codes under a prefix, e.g. T383X (from T38.3X-) -> T383X1, T383X2, ..."""
+    matches = []
+    for code in sorted_codes[bisect_left(sorted_codes, prefix):]:
+        if not code.startswith(prefix):
+            break
+        # Descendants sort right after their ancestor, so only the last match needs checking
+        if not matches or not code.startswith(matches[-1]):
+            matches.append(code)
+    return matches
+
+def expand_note_codes(note, code_index):
+    """
+    Codes referenced in a note's parentheses, with ranges and prefixes expanded
+    against the hierarchy. Returns (codes, number of references matching no loaded code).
+    """
+    loaded, sorted_codes, prefixes_by_length = code_index
+    codes = set()
+    unresolved = 0
+    for group in re.findall(r'\(([^)]*)\)', note):
+        for start, end in NOTE_CODE_PATTERN.findall(group):
+            start = start.rstrip('.').replace('.', '')
+            end = end.rstrip('.').replace('.', '')
+            if not end:
+                matches = [start] if start in loaded else resolve_prefix(start, sorted_codes)
+            else:
+                # A range names its endpoints at one level, e.g. E08-E13 covers categories
+                upper = end[:len(start)].ljust(len(start), 'Z')
+                matches = [prefix for prefix in prefixes_by_length.get(len(start), ())
+                           if start <= prefix <= upper]
+            if not matches:
+                unresolved += 1
+            codes.update(dotted_code(match) for match in matches)
+    return codes, unresolved
+
+def code_rule_rows(diagnosis_codes, codes):
+    """Expand parsed excludes / code-first notes into (code, related_code) rule rows"""
+    loaded = {code.replace('.', '') for code in codes}
+    prefixes_by_length = {}
+    for undotted in loaded:
+        prefixes_by_length.setdefault(len(undotted), []).append(undotted)
+    prefixes_by_length = {length: sorted(p) for length, p in prefixes_by_length.items()}
+    code_index = (loaded, sorted(loaded), prefixes_by_length)
+    
+    rows = {}
+    unresolved = 0
+    for code_data in diagnosis_codes:
+        for rule_type, note in code_data.get('rule_notes', []):
+            related_codes, missing = expand_note_codes(note, code_index)
+            unresolved += missing
+            for related_code in related_codes:
+                if related_code != code_data['code']:
+                    key = (rule_type, code_data['code'], related_code)
+                    rows[key] = {
+                        'rule_type': rule_type,
+                        'code': code_data['code'],
+                        'related_code': related_code,
+                        'note': note
+                    }
+    
+    if unresolved:
+        print(f"⚠️  {unresolved} note code references matched no loaded code and were dropped")
+    return list(rows.values())
+
+def load_code_rules(cursor, rule_rows, hierarchy_rows):
+    """Replace the code rule and hierarchy tables in one bulk transaction"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS icd10_code_rules (
+            rule_type VARCHAR(20) NOT NULL,
+            code VARCHAR(10) NOT NULL,
+            related_code VARCHAR(10) NOT NULL,
+            note TEXT,
+            PRIMARY KEY (rule_type, code, related_code)
+        );
+        CREATE INDEX IF NOT EXISTS idx_icd10_code_rules_related ON icd10_code_rules(related_code, rule_type);
+        
+        CREATE TABLE IF NOT EXISTS icd10_code_hierarchy (
+            code VARCHAR(10) NOT NULL,
+            ancestor VARCHAR(10) NOT NULL,
+            PRIMARY KEY (code, ancestor)
+        );
+        CREATE INDEX IF NOT EXISTS idx_icd10_code_hierarchy_ancestor ON icd10_code_hierarchy(ancestor);
+    """)
+    
+    print(f"💾 Loading {len(rule_rows)} code rules and {len(hierarchy_rows)} hierarchy links...")
+    
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("TRUNCATE icd10_code_rules, icd10_code_hierarchy")
+        copy_rows(cursor, 'icd10_code_rules', ['rule_type', 'code', 'related_code', 'note'], rule_rows)
+        copy_rows(cursor, 'icd10_code_hierarchy', ['code', 'ancestor'], hierarchy_rows)
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    
+    counts = {}
+    for row in rule_rows:
+        counts[row['rule_type']] = counts.get(row['rule_type'], 0) + 1
+    for rule_type in CODE_RULE_TYPES:
+        print(f"   {rule_type}: {counts.get(rule_type, 0):,} code pairs")
+    print("✅ Code rules loaded")
+
 def parse_icd10pcs_xml(xml_file):
     """Parse ICD-10-PCS procedure codes from CMS XML format"""
     print(f"🔧 Parsing ICD-10-PCS file: {xml_file}")
@@ -146,6 +415,7 @@ def insert_codes(cursor, table_name, codes, code_fields):
     
     print(f"💾 Inserting {len(codes)} codes into {table_name}...")
     
+    started = time.perf_counter()
     inserted = 0
     for code_data in codes:
         try:
@@ -169,7 +439,167 @@ def insert_codes(cursor, table_name, codes, code_fields):
         except Exception as e:
             print(f"❌ Error inserting code {code_data.get('code', 'unknown')}: {e}")
     
-    print(f"✅ Inserted {inserted} codes into {table_name}")
+    print(f"✅ Inserted {inserted} codes into {table_name} in {time.perf_counter() - started:.1f}s")
+    return inserted
+
+def partition_key(code):
+    """Partition key for a code: CM chapter letter or PCS section character"""
+    return code[:1].upper()
+
+def split_by_partition(codes):
+    """Group codes by partition key, keeping the last row seen for each code"""
+    partitions = {}
+    for code_data in codes:
+        key = partition_key(code_data['code'])
+        partitions.setdefault(key, {})[code_data['code']] = code_data
+    return {key: list(rows.values()) for key, rows in partitions.items()}
+
+def assign_partitions(partitions, workers):
+    """Spread partitions across workers so each gets a similar number of rows"""
+    buckets = [[] for _ in range(max(1, min(workers, len(partitions))))]
+    loads = [0] * len(buckets)
+    for key in sorted(partitions, key=lambda k: len(partitions[k]), reverse=True):
+        target = loads.index(min(loads))
+        buckets[target].append(key)
+        loads[target] += len(partitions[key])
+    return buckets
+
+def create_partitioned_load_table(cursor, table_name, fields, partition_keys):
+    """Create an unlogged load table list-partitioned by leading code character"""
+    load_table = f"{table_name}_load"
+    
+    # Match the target column types so the merge needs no casts
+    cursor.execute("""
+        SELECT attname, format_type(atttypid, atttypmod) AS column_type
+        FROM pg_attribute
+        WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+    """, (table_name,))
+    column_types = {row['attname']: row['column_type'] for row in cursor.fetchall()}
+    columns = ',\n            '.join(
+        f"{field} {column_types.get(field, 'TEXT')}" for field in fields if field != 'code'
+    )
+    
+    cursor.execute(f"DROP TABLE IF EXISTS {load_table}")
+    cursor.execute(f"""
+        CREATE UNLOGGED TABLE {load_table} (
+            code_prefix CHAR(1) NOT NULL,
+            code VARCHAR(10) NOT NULL,
+            {columns},
+            PRIMARY KEY (code_prefix, code)
+        ) PARTITION BY LIST (code_prefix)
+    """)
+    
+    for key in partition_keys:
+        cursor.execute(f"""
+            CREATE UNLOGGED TABLE {load_table}_{key.lower()}
+            PARTITION OF {load_table} FOR VALUES IN (%s)
+        """, (key,))
+    
+    print(f"🗂️  Created {load_table} with {len(partition_keys)} partitions")
+    return load_table
+
+def merge_partition(cursor, table_name, partition_table, fields):
+    """Upsert one staged partition into the target table"""
+    update_clause = ', '.join([f"{field} = EXCLUDED.{field}" for field in fields if field != 'code'])
+    cursor.execute(f"""
+        INSERT INTO {table_name} ({', '.join(fields)})
+        SELECT {', '.join(fields)} FROM {partition_table}
+        ON CONFLICT (code) DO UPDATE SET {update_clause}
+    """)
+    return cursor.rowcount
+
+def load_partitions(table_name, fields, partition_keys, partitions):
+    """
+    Worker: COPY each assigned partition into its unlogged load table, check the
+    row count and merge it into the target, one transaction per partition
+    """
+    conn = psycopg2.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    merged = {}
+    
+    try:
+        for key in partition_keys:
+            partition_table = f"{table_name}_load_{key.lower()}"
+            rows = [dict(row, code_prefix=key) for row in partitions[key]]
+            copy_rows(cursor, partition_table, ['code_prefix'] + fields, rows)
+            
+            # Partitions hold disjoint codes, so workers never wait on each other's rows
+            cursor.execute(f"SELECT COUNT(*) FROM {partition_table}")
+            staged = cursor.fetchone()[0]
+            if staged != len(rows):
+                raise RuntimeError(f"Partition {key}: expected {len(rows)} rows, staged {staged}")
+            
+            merged[key] = merge_partition(cursor, table_name, partition_table, fields)
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+    
+    return merged
+
+def verify_partition_counts(cursor, table_name, partitions):
+    """Check every partition landed in full"""
+    load_table = f"{table_name}_load"
+    
+    cursor.execute(f"SELECT code_prefix, COUNT(*) AS count FROM {load_table} GROUP BY code_prefix")
+    actual = {row['code_prefix']: row['count'] for row in cursor.fetchall()}
+    expected = {key: len(rows) for key, rows in partitions.items()}
+    
+    ok = True
+    for key in sorted(set(actual) | set(expected)):
+        if actual.get(key, 0) != expected.get(key, 0):
+            print(f"❌ Partition {key}: expected {expected.get(key, 0)} rows, found {actual.get(key, 0)}")
+            ok = False
+    return ok
+
+def verify_merged_codes(cursor, table_name):
+    """Every staged code is in the target with the staged description"""
+    cursor.execute(f"""
+        SELECT COUNT(*) AS count FROM {table_name}_load l
+        LEFT JOIN {table_name} t ON t.code = l.code
+        WHERE t.code IS NULL OR t.description IS DISTINCT FROM l.description
+    """)
+    mismatched = cursor.fetchone()['count']
+    if mismatched:
+        print(f"❌ {mismatched} loaded codes are missing or differ in {table_name}")
+    return mismatched == 0
+
+def parallel_copy_codes(cursor, table_name, codes, code_fields, workers):
+    """
+    Load and merge codes with one connection per group of partitions, then check
+    the result. Each partition commits on its own; merges are upserts, so
+    re-running after a failure converges on the same table.
+    """
+    if not codes:
+        return 0
+    
+    started = time.perf_counter()
+    fields = list(code_fields.keys())
+    partitions = split_by_partition(codes)
+    create_partitioned_load_table(cursor, table_name, fields, sorted(partitions))
+    buckets = assign_partitions(partitions, workers)
+    
+    print(f"🚀 Loading {len(codes)} codes into {table_name} with {len(buckets)} parallel workers...")
+    
+    inserted = 0
+    with ThreadPoolExecutor(max_workers=len(buckets)) as executor:
+        futures = [
+            executor.submit(load_partitions, table_name, fields, bucket, partitions)
+            for bucket in buckets
+        ]
+        for future in futures:
+            inserted += sum(future.result().values())
+    
+    # Only the checks run serially; the load table is kept for inspection if they fail
+    if not verify_partition_counts(cursor, table_name, partitions) or not verify_merged_codes(cursor, table_name):
+        raise RuntimeError(f"Partitioned load of {table_name} failed consistency check")
+    print(f"✅ Consistency check passed for {table_name} ({len(codes)} codes)")
+    
+    cursor.execute(f"DROP TABLE IF EXISTS {table_name}_load")
+    print(f"✅ Inserted {inserted} codes into {table_name} in {time.perf_counter() - started:.1f}s")
     return inserted
 
 def main():
@@ -178,6 +608,12 @@ def main():
     parser.add_argument('--dry-run', action='store_true', help='Parse only, do not insert')
     parser.add_argument('--diagnosis-only', action='store_true', help='Import only diagnosis codes')
     parser.add_argument('--procedure-only', action='store_true', help='Import only procedure codes')
+    parser.add_argument('--parallel-workers', type=int, default=0,
+                        help='Load via partitioned parallel COPY with this many connections')
+    parser.add_argument('--skip-terms', action='store_true', help='Do not rebuild the term index')
+    parser.add_argument('--notify-broker',
+                        help='Also announce the code set change on RabbitMQ (amqp:// URL, or file:// for a local stand-in)')
+    parser.add_argument('--snapshot-dir', help='Write a versioned snapshot of the code tables here after loading')
     
     args = parser.parse_args()
     
@@ -187,6 +623,7 @@ def main():
     # Find XML files
     diagnosis_files = []
     procedure_files = []
+    index_files = []
     
     for root, dirs, files in os.walk(args.data_dir):
         for file in files:
@@ -196,9 +633,13 @@ def main():
                     diagnosis_files.append(full_path)
                 elif 'icd10pcs' in file.lower() and 'tabular' in file.lower():
                     procedure_files.append(full_path)
+                elif ('icd10cm' in file.lower() and 'index' in file.lower()
+                      and 'drug' not in file.lower() and 'neoplasm' not in file.lower()):
+                    index_files.append(full_path)
     
     print(f"📁 Found {len(diagnosis_files)} ICD-10-CM files")
     print(f"📁 Found {len(procedure_files)} ICD-10-PCS files")
+    print(f"📁 Found {len(index_files)} ICD-10-CM index files")
     
     if not diagnosis_files and not procedure_files:
         print("❌ No suitable XML files found")
@@ -211,57 +652,114 @@ def main():
             conn.autocommit = True
             cursor = conn.cursor(cursor_factory=RealDictCursor)
             print("✅ Connected to database")
+            code_state = fetch_code_state(cursor)
         except Exception as e:
             print(f"❌ Database connection failed: {e}")
             return
     
     total_inserted = 0
     
+    term_rows = []
+    diagnosis_codes = []
+    
     # Process diagnosis codes
     if not args.procedure_only and diagnosis_files:
-        for file_path in diagnosis_files:
-            diagnosis_codes = parse_icd10cm_xml(file_path)
+        parsed_codes = []
+        # Newest release first, so it wins when normalization deduplicates
+        for file_path in sorted(diagnosis_files, reverse=True):
+            parsed_codes.extend(parse_icd10cm_xml(file_path))
+        
+        diagnosis_codes, _ = normalize_diagnosis_batch(parsed_codes)
+        term_rows.extend(inclusion_term_rows(diagnosis_codes))
+        
+        if diagnosis_codes and not args.dry_run:
+            cursor.execute("""
+                ALTER TABLE icd10_diagnosis_codes ADD COLUMN IF NOT EXISTS is_billable BOOLEAN
+            """)
             
-            if diagnosis_codes and not args.dry_run:
-                diag_fields = {
-                    'code': str,
-                    'description': str,
-                    'chapter_name': str,
-                    'category': str
-                }
+            diag_fields = {
+                'code': str,
+                'description': str,
+                'chapter_name': str,
+                'category': str,
+                'is_billable': bool
+            }
+            if args.parallel_workers > 0:
+                try:
+                    inserted = parallel_copy_codes(cursor, 'icd10_diagnosis_codes', diagnosis_codes,
+                                                   diag_fields, args.parallel_workers)
+                except Exception as e:
+                    # Merged partitions stay; re-running converges and the _load table is kept for inspection
+                    print(f"❌ Parallel load of icd10_diagnosis_codes failed: {e}")
+                    cursor.close()
+                    conn.close()
+                    sys.exit(1)
+            else:
                 inserted = insert_codes(cursor, 'icd10_diagnosis_codes', diagnosis_codes, diag_fields)
-                total_inserted += inserted
+            total_inserted += inserted
+            reconcile_undotted_codes(cursor)
+    
+    # Rebuild the term index against the diagnosis codes now in the table
+    if not args.procedure_only and not args.skip_terms:
+        for file_path in index_files:
+            term_rows.extend(parse_icd10cm_index_xml(file_path))
+        
+        if term_rows and not args.dry_run:
+            load_term_index(cursor, term_rows)
+    
+    # Rebuild the excludes / code-first rules against the full code hierarchy
+    if diagnosis_codes:
+        codes = {code_data['code'] for code_data in diagnosis_codes}
+        rule_rows = code_rule_rows(diagnosis_codes, codes)
+        print(f"📊 Expanded {len(rule_rows)} code rule pairs")
+        
+        if not args.dry_run:
+            load_code_rules(cursor, rule_rows, code_hierarchy_rows(codes))
     
     # Process procedure codes  
     if not args.diagnosis_only and procedure_files:
-        for file_path in procedure_files:
-            procedure_codes = parse_icd10pcs_xml(file_path)
+        parsed_codes = []
+        for file_path in sorted(procedure_files, reverse=True):
+            parsed_codes.extend(parse_icd10pcs_xml(file_path))
+        
+        procedure_codes, _ = normalize_procedure_batch(parsed_codes)
+        
+        if procedure_codes and not args.dry_run:
+            # First ensure the table exists with correct schema
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS icd10_procedure_codes (
+                    id SERIAL PRIMARY KEY,
+                    code VARCHAR(10) NOT NULL UNIQUE,
+                    description TEXT NOT NULL,
+                    section_name VARCHAR(255),
+                    body_system VARCHAR(255),
+                    operation_name VARCHAR(255),
+                    operation_definition TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+            """)
             
-            if procedure_codes and not args.dry_run:
-                # First ensure the table exists with correct schema
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS icd10_procedure_codes (
-                        id SERIAL PRIMARY KEY,
-                        code VARCHAR(10) NOT NULL UNIQUE,
-                        description TEXT NOT NULL,
-                        section_name VARCHAR(255),
-                        body_system VARCHAR(255),
-                        operation_name VARCHAR(255),
-                        operation_definition TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    );
-                """)
-                
-                proc_fields = {
-                    'code': str,
-                    'description': str,
-                    'section_name': str,
-                    'body_system': str,
-                    'operation_name': str,
-                    'operation_definition': str
-                }
+            proc_fields = {
+                'code': str,
+                'description': str,
+                'section_name': str,
+                'body_system': str,
+                'operation_name': str,
+                'operation_definition': str
+            }
+            if args.parallel_workers > 0:
+                try:
+                    inserted = parallel_copy_codes(cursor, 'icd10_procedure_codes', procedure_codes,
+                                                   proc_fields, args.parallel_workers)
+                except Exception as e:
+                    # Merged partitions stay; re-running converges and the _load table is kept for inspection
+                    print(f"❌ Parallel load of icd10_procedure_codes failed: {e}")
+                    cursor.close()
+                    conn.close()
+                    sys.exit(1)
+            else:
                 inserted = insert_codes(cursor, 'icd10_procedure_codes', procedure_codes, proc_fields)
-                total_inserted += inserted
+            total_inserted += inserted
     
     # Show summary
     if not args.dry_run:
@@ -279,6 +777,11 @@ def main():
         print(f"   ICD-10-PCS Procedure Codes: {proc_count:,}")
         print(f"   Total Medical Codes: {diag_count + proc_count:,}")
         
+        publish_code_set_change(cursor, 'import_full_icd10', code_state, args.notify_broker)
+        
+        if args.snapshot_dir:
+            create_snapshot(cursor, args.snapshot_dir, source='import_full_icd10')
+        
         cursor.close()
         conn.close()
     
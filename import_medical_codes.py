@@ -11,6 +11,8 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 import argparse
 from datetime import datetime
+from normalize_codes import (CPT_CODE_PATTERN, normalize_diagnosis_batch, normalize_procedure_batch,
+                             reconcile_undotted_codes)
 
 # Database connection parameters
 DB_CONFIG = {
@@ -85,6 +87,12 @@ def parse_icd10cm_diagnosis(xml_file_path):
         root = tree.getroot()
         codes = []
         
+        # Codes under a sevenChrDef, on the diag itself or an ancestor, need a 7th character
+        seventh_character_diags = {
+            diag for parent in root.iter('diag') if parent.find('sevenChrDef') is not None
+            for diag in parent.iter('diag')
+        }
+        
         # Navigate through chapters and sections
         for chapter in root.findall('.//chapter'):
             chapter_name = chapter.find('desc').text if chapter.find('desc') is not None else "Unknown Chapter"
@@ -98,13 +106,14 @@ def parse_icd10cm_diagnosis(xml_file_path):
                     desc_elem = diag.find('desc')
                     description = desc_elem.text if desc_elem is not None else 'No description'
                     
-                    if code and len(code) >= 3:  # Valid ICD-10 codes are at least 3 characters
+                    if code:  # Format is validated for the whole batch in normalize_codes
                         codes.append({
                             'code': code,
                             'description': description,
                             'chapter_name': chapter_name[:255],
                             'section_name': section_name[:255],
-                            'category': code[:3]  # First 3 characters are category
+                            'category': code[:3],  # First 3 characters are category
+                            'requires_seventh_character': diag in seventh_character_diags
                         })
         
         print(f"📊 Found {len(codes)} ICD-10-CM diagnosis codes")
@@ -194,12 +203,18 @@ def add_common_cpt_codes(cursor):
         ('73721', 'MRI lower extremity without contrast', 'Radiology')
     ]
     
-    for code, description, category in common_cpts:
+    common_cpts, _ = normalize_procedure_batch(
+        [{'code': code, 'description': description, 'category': category}
+         for code, description, category in common_cpts],
+        CPT_CODE_PATTERN, 'CPT normalization'
+    )
+    
+    for code_data in common_cpts:
         cursor.execute("""
             INSERT INTO cpt_procedure_codes (code, description, category)
-            VALUES (%s, %s, %s)
+            VALUES (%(code)s, %(description)s, %(category)s)
             ON CONFLICT (code) DO NOTHING
-        """, (code, description, category))
+        """, code_data)
     
     print("✅ Added common CPT procedure codes")
 
@@ -211,17 +226,22 @@ def insert_diagnosis_codes(cursor, codes):
         
     print(f"💾 Inserting {len(codes)} diagnosis codes...")
     
+    # Billable flag derived by normalize_codes.py
+    cursor.execute("ALTER TABLE icd10_diagnosis_codes ADD COLUMN IF NOT EXISTS is_billable BOOLEAN")
+    
     for code_data in codes:
         try:
             cursor.execute("""
                 INSERT INTO icd10_diagnosis_codes 
-                (code, description, chapter_name, section_name, category)
-                VALUES (%(code)s, %(description)s, %(chapter_name)s, %(section_name)s, %(category)s)
+                (code, description, chapter_name, section_name, category, is_billable)
+                VALUES (%(code)s, %(description)s, %(chapter_name)s, %(section_name)s, %(category)s,
+                        %(is_billable)s)
                 ON CONFLICT (code) DO UPDATE SET
                 description = EXCLUDED.description,
                 chapter_name = EXCLUDED.chapter_name,
                 section_name = EXCLUDED.section_name,
-                category = EXCLUDED.category
+                category = EXCLUDED.category,
+                is_billable = EXCLUDED.is_billable
             """, code_data)
         except Exception as e:
             print(f"❌ Error inserting diagnosis code {code_data['code']}: {e}")
@@ -295,13 +315,14 @@ def main():
     
     # Process diagnosis codes
     if not args.procedure_only and diagnosis_file:
-        diagnosis_codes = parse_icd10cm_diagnosis(diagnosis_file)
+        diagnosis_codes, _ = normalize_diagnosis_batch(parse_icd10cm_diagnosis(diagnosis_file))
         if diagnosis_codes and not args.dry_run:
             insert_diagnosis_codes(cursor, diagnosis_codes)
+            reconcile_undotted_codes(cursor)
     
     # Process procedure codes  
     if not args.diagnosis_only and procedure_file:
-        procedure_codes = parse_icd10pcs_procedure(procedure_file)
+        procedure_codes, _ = normalize_procedure_batch(parse_icd10pcs_procedure(procedure_file))
         if procedure_codes and not args.dry_run:
             insert_procedure_codes(cursor, procedure_codes)
     
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Procedure Edit Pair Import Script
+Loads NCCI-style procedure-to-procedure (PTP) edit files into a keyed
+column 1 / column 2 lookup table used by scrub_claim_line_items.py.
+"""
+
+import os
+import sys
+import psycopg2
+from psycopg2.extras import RealDictCursor
+import argparse
+import re
+from datetime import datetime
+from bulk_copy import copy_rows
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'claims_db',
+    'user': 'claims_user',
+    'password': 'claims_password',
+    'port': 5432
+}
+
+EDIT_FIELDS = ['column1_code', 'column2_code', 'effective_date', 'deletion_date',
+               'modifier_indicator', 'rationale']
+
+PROCEDURE_CODE_PATTERN = re.compile(r'^[0-9A-Z]{5}$')
+
+def create_tables(cursor):
+    """Create the procedure edit pair table"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS procedure_edit_pairs (
+            column1_code VARCHAR(10) NOT NULL,
+            column2_code VARCHAR(10) NOT NULL,
+            effective_date DATE NOT NULL,
+            deletion_date DATE,
+            modifier_indicator CHAR(1) NOT NULL,
+            rationale TEXT,
+            PRIMARY KEY (column1_code, column2_code, effective_date)
+        );
+    """)
+    print("✅ Created procedure edit pair table")
+
+def parse_date(value):
+    """CMS dates are YYYYMMDD; '*' or blank means none"""
+    value = value.strip()
+    if not value or value == '*':
+        return None
+    return datetime.strptime(value, '%Y%m%d').date().isoformat()
+
+def parse_edit_file(file_path):
+    """Parse a tab-delimited PTP edit file, skipping header and footnote lines"""
+    print(f"📋 Parsing edit file: {file_path}")
+
+    edits = {}
+    skipped = 0
+    with open(file_path, encoding='latin-1') as f:
+        for line in f:
+            fields = [field.strip() for field in line.rstrip('\n').split('\t')]
+            # Column 1, Column 2, prior-to-1996 flag, effective, deletion, modifier, rationale
+            if len(fields) < 6 or not PROCEDURE_CODE_PATTERN.match(fields[0]):
+                continue
+            try:
+                edit = {
+                    'column1_code': fields[0],
+                    'column2_code': fields[1],
+                    'effective_date': parse_date(fields[3]),
+                    'deletion_date': parse_date(fields[4]),
+                    'modifier_indicator': fields[5][:1],
+                    'rationale': fields[6] if len(fields) > 6 else ''
+                }
+            except ValueError:
+                skipped += 1
+                continue
+            if edit['effective_date'] is None or edit['modifier_indicator'] not in ('0', '1', '9'):
+                skipped += 1
+                continue
+            edits[(edit['column1_code'], edit['column2_code'], edit['effective_date'])] = edit
+
+    print(f"📊 Parsed {len(edits)} edit pairs ({skipped} malformed lines skipped)")
+    return list(edits.values())
+
+def load_edit_pairs(cursor, edits):
+    """Replace the edit pair table contents in one bulk transaction"""
+    print(f"💾 Loading {len(edits)} edit pairs...")
+
+    cursor.execute("BEGIN")
+    try:
+        cursor.execute("TRUNCATE procedure_edit_pairs")
+        copy_rows(cursor, 'procedure_edit_pairs', EDIT_FIELDS, edits)
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+
+    print("✅ Edit pairs loaded")
+
+def main():
+    parser = argparse.ArgumentParser(description='Import procedure-to-procedure edit pair files')
+    parser.add_argument('--data-dir', default='/opt/data', help='Data directory path')
+    parser.add_argument('--dry-run', action='store_true', help='Parse only, do not insert')
+
+    args = parser.parse_args()
+
+    print("🧾 Procedure Edit Pair Import Tool")
+    print("=" * 40)
+
+    edit_files = []
+    for root, dirs, files in os.walk(args.data_dir):
+        for file in files:
+            name = file.lower()
+            if ('ptp' in name or 'ncci' in name) and name.endswith(('.txt', '.tsv')):
+                edit_files.append(os.path.join(root, file))
+
+    print(f"📁 Found {len(edit_files)} edit files")
+    if not edit_files:
+        print("❌ No edit files found")
+        return
+
+    # Files split by column 1 range are combined; later files win on duplicates
+    edits = {}
+    for file_path in sorted(edit_files):
+        for edit in parse_edit_file(file_path):
+            edits[(edit['column1_code'], edit['column2_code'], edit['effective_date'])] = edit
+    edits = list(edits.values())
+
+    if args.dry_run:
+        print(f"\n✅ Dry run completed! Parsed {len(edits)} edit pairs.")
+        return
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        conn.autocommit = True
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        print("✅ Connected to database")
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+        sys.exit(1)
+
+    try:
+        create_tables(cursor)
+        load_edit_pairs(cursor, edits)
+
+        cursor.execute("""
+            SELECT COUNT(*) AS total,
+                   COUNT(*) FILTER (WHERE deletion_date IS NULL) AS active
+            FROM procedure_edit_pairs
+        """)
+        counts = cursor.fetchone()
+        print("\n📊 Import Summary:")
+        print(f"   Edit pairs: {counts['total']:,}")
+        print(f"   Active edit pairs: {counts['active']:,}")
+        print("\n✅ Import completed!")
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
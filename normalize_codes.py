@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Batch Normalization and Validation for Parsed Medical Codes
+Runs between parsing and loading: normalizes code format, derives category
+and billable flags, deduplicates across sources and rejects malformed rows.
+"""
+
+import re
+import time
+
+# ICD-10-CM: category of letter, digit, alphanumeric, then up to four characters after the dot
+DIAGNOSIS_CODE_PATTERN = re.compile(r'[A-Z][0-9][0-9A-Z](?:\.[0-9A-Z]{1,4})?')
+# ICD-10-PCS: seven characters, letters O and I are never used
+PCS_CODE_PATTERN = re.compile(r'[0-9A-HJ-NP-Z]{7}')
+# CPT / HCPCS Level I: four digits plus a digit or category II/III letter
+CPT_CODE_PATTERN = re.compile(r'[0-9]{4}[0-9A-Z]')
+
+def clean_code(code):
+    """Uppercase a raw code and drop surrounding whitespace and trailing dashes"""
+    return (code or '').strip().rstrip('-').rstrip('.').upper()
+
+def dotted_diagnosis_code(code):
+    """E119 -> E11.9; codes that already carry a dot are left alone"""
+    if len(code) > 3 and '.' not in code:
+        return f"{code[:3]}.{code[3:]}"
+    return code
+
+def report(stage, started, total, kept, rejects):
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"🧮 {stage}: {kept} kept, {len(rejects)} rejected of {total} in {elapsed:.0f} ms")
+    reasons = {}
+    for reject in rejects:
+        reasons[reject['reason']] = reasons.get(reject['reason'], 0) + 1
+    for reason, count in sorted(reasons.items(), key=lambda item: -item[1]):
+        print(f"   ⚠️  {reason}: {count}")
+
+def normalize_diagnosis_batch(rows):
+    """
+    Normalize a batch of parsed ICD-10-CM rows.
+    Earlier rows win when the same code appears twice, so pass the
+    authoritative source first. Returns (rows, rejects).
+    """
+    started = time.perf_counter()
+    fullmatch = DIAGNOSIS_CODE_PATTERN.fullmatch
+
+    normalized = {}
+    rejects = []
+    for row in rows:
+        raw_code = row.get('code')
+        code = dotted_diagnosis_code(clean_code(raw_code))
+        description = (row.get('description') or '').strip()
+
+        if not code:
+            reason = 'missing code'
+        elif not fullmatch(code):
+            reason = 'malformed code'
+        elif not description:
+            reason = 'missing description'
+        elif code in normalized:
+            reason = 'duplicate code'
+        else:
+            normalized[code] = dict(row, code=code, description=description, category=code[:3])
+            continue
+        rejects.append({'code': raw_code, 'reason': reason})
+
+    # A code is billable when nothing more specific sits below it and, where a
+    # sevenChrDef applies (injury and poisoning codes), it already has its 7th character
+    parents = set()
+    for code in normalized:
+        undotted = code.replace('.', '')
+        for length in range(3, len(undotted)):
+            parents.add(dotted_diagnosis_code(undotted[:length]))
+    for code, row in normalized.items():
+        incomplete = row.get('requires_seventh_character') and len(code.replace('.', '')) < 7
+        row['is_billable'] = code not in parents and not incomplete
+
+    report('ICD-10-CM normalization', started, len(rows), len(normalized), rejects)
+    return list(normalized.values()), rejects
+
+def normalize_procedure_batch(rows, pattern=PCS_CODE_PATTERN, stage='ICD-10-PCS normalization'):
+    """Normalize a batch of procedure rows against a code pattern. Returns (rows, rejects)."""
+    started = time.perf_counter()
+    fullmatch = pattern.fullmatch
+
+    normalized = {}
+    rejects = []
+    for row in rows:
+        raw_code = row.get('code')
+        code = clean_code(raw_code).replace('.', '')
+        description = (row.get('description') or '').strip()
+
+        if not code:
+            reason = 'missing code'
+        elif not fullmatch(code):
+            reason = 'malformed code'
+        elif not description:
+            reason = 'missing description'
+        elif code in normalized:
+            reason = 'duplicate code'
+        else:
+            normalized[code] = dict(row, code=code, description=description)
+            continue
+        rejects.append({'code': raw_code, 'reason': reason})
+
+    report(stage, started, len(rows), len(normalized), rejects)
+    return list(normalized.values()), rejects
+
+def reconcile_undotted_codes(cursor, table_name='icd10_diagnosis_codes'):
+    """Remove undotted rows (E119) that duplicate a dotted code (E11.9) already in the table"""
+    cursor.execute(f"""
+        DELETE FROM {table_name} u
+        USING {table_name} d
+        WHERE length(u.code) > 3 AND position('.' in u.code) = 0
+        AND d.code = left(u.code, 3) || '.' || substr(u.code, 4)
+    """)
+    if cursor.rowcount:
+        print(f"🧹 Removed {cursor.rowcount} undotted duplicate codes from {table_name}")
+    return cursor.rowcount
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Code Usage Statistics Refresh
+Aggregates how often each diagnosis and procedure code is billed so code
+search can rank by popularity. Only claims added since the last run are scanned.
+"""
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+import argparse
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'claims_db',
+    'user': 'claims_user',
+    'password': 'claims_password',
+    'port': 5432
+}
+
+# Claim codes may be stored without the dot ("E119"); count them under the dotted form
+DOTTED_CODE_SQL = """
+    CASE WHEN length(c) > 3 AND position('.' in c) = 0
+         THEN left(c, 3) || '.' || substr(c, 4) ELSE c END
+"""
+
+# Source table -> (code type, aggregation over rows with id in (%s, %s])
+USAGE_SOURCES = {
+    'claims': ('diagnosis', f"""
+        SELECT {DOTTED_CODE_SQL} AS code, COUNT(*) AS usage_count, MAX(cl.service_date) AS last_used
+        FROM claims cl, unnest(cl.diagnosis_codes) AS dc,
+             LATERAL (SELECT UPPER(TRIM(dc)) AS c) AS n
+        WHERE cl.id > %s AND cl.id <= %s AND n.c <> ''
+        GROUP BY 1
+    """),
+    'claim_line_items': ('procedure', """
+        SELECT UPPER(TRIM(li.procedure_code)) AS code, COUNT(*) AS usage_count, MAX(li.service_date) AS last_used
+        FROM claim_line_items li
+        WHERE li.id > %s AND li.id <= %s AND TRIM(li.procedure_code) <> ''
+        GROUP BY 1
+    """),
+}
+
+# Code type -> lookup tables that carry a denormalized usage_count for search
+CODE_TABLES = {
+    'diagnosis': ['icd10_diagnosis_codes'],
+    'procedure': ['cpt_procedure_codes', 'icd10_procedure_codes'],
+}
+
+def create_tables(cursor):
+    """Create usage statistics and watermark tables"""
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS code_usage_stats (
+            code_type VARCHAR(20) NOT NULL,
+            code VARCHAR(20) NOT NULL,
+            usage_count BIGINT NOT NULL DEFAULT 0,
+            last_used DATE,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (code_type, code)
+        );
+        CREATE INDEX IF NOT EXISTS idx_code_usage_rank ON code_usage_stats(code_type, usage_count DESC);
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS code_usage_watermarks (
+            source_table VARCHAR(100) PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+    for tables in CODE_TABLES.values():
+        for table_name in tables:
+            cursor.execute("SELECT to_regclass(%s) AS oid", (table_name,))
+            if cursor.fetchone()['oid'] is not None:
+                cursor.execute(f"""
+                    ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS usage_count BIGINT NOT NULL DEFAULT 0;
+                    CREATE INDEX IF NOT EXISTS idx_{table_name}_usage ON {table_name}(usage_count DESC, code);
+                """)
+
+def consolidate_undotted_stats(cursor):
+    """Fold diagnosis stats counted under an undotted code into the dotted code"""
+    cursor.execute(f"""
+        WITH undotted AS (
+            DELETE FROM code_usage_stats
+            WHERE code_type = 'diagnosis' AND length(code) > 3 AND position('.' in code) = 0
+            RETURNING code AS c, usage_count, last_used
+        )
+        INSERT INTO code_usage_stats (code_type, code, usage_count, last_used)
+        SELECT 'diagnosis', {DOTTED_CODE_SQL}, SUM(usage_count), MAX(last_used)
+        FROM undotted GROUP BY 2
+        ON CONFLICT (code_type, code) DO UPDATE SET
+        usage_count = code_usage_stats.usage_count + EXCLUDED.usage_count,
+        last_used = GREATEST(code_usage_stats.last_used, EXCLUDED.last_used),
+        updated_at = CURRENT_TIMESTAMP
+        RETURNING code
+    """)
+    merged = [row['code'] for row in cursor.fetchall()]
+    if merged:
+        print(f"🧹 Merged undotted usage counts into {len(merged)} dotted codes")
+    return merged
+
+def get_watermark(cursor, source_table):
+    """Return the highest source row id already counted"""
+    cursor.execute("SELECT last_id FROM code_usage_watermarks WHERE source_table = %s", (source_table,))
+    row = cursor.fetchone()
+    return row['last_id'] if row else 0
+
+def safe_upper_id(cursor, source_table, last_id, lag_minutes):
+    """
+    Highest id that is safe to count up to. Ids are taken before commit, so a
+    row below MAX(id) can still become visible later, and an uncommitted row
+    cannot be seen to stop at. The bound therefore comes from rows created
+    before the lag window; only a transaction open longer than the window can
+    still commit below it.
+    """
+    cursor.execute(f"""
+        SELECT MAX(id) FILTER (WHERE created_at < now() - make_interval(mins => %s)) AS settled_id
+        FROM {source_table} WHERE id > %s
+    """, (lag_minutes, last_id))
+    return max(cursor.fetchone()['settled_id'] or 0, last_id)
+
+def refresh_source(cursor, source_table, code_type, query, full=False, lag_minutes=10):
+    """Fold rows added since the watermark into code_usage_stats"""
+    last_id = 0 if full else get_watermark(cursor, source_table)
+    max_id = safe_upper_id(cursor, source_table, last_id, lag_minutes)
+
+    if max_id <= last_id:
+        print(f"⏭️  {source_table}: no new rows since id {last_id}")
+        return []
+
+    cursor.execute(f"""
+        INSERT INTO code_usage_stats (code_type, code, usage_count, last_used)
+        SELECT %s, code, usage_count, last_used FROM ({query}) AS delta
+        ON CONFLICT (code_type, code) DO UPDATE SET
+        usage_count = code_usage_stats.usage_count + EXCLUDED.usage_count,
+        last_used = GREATEST(code_usage_stats.last_used, EXCLUDED.last_used),
+        updated_at = CURRENT_TIMESTAMP
+        RETURNING code
+    """, (code_type, last_id, max_id))
+    changed = [row['code'] for row in cursor.fetchall()]
+
+    cursor.execute("""
+        INSERT INTO code_usage_watermarks (source_table, last_id)
+        VALUES (%s, %s)
+        ON CONFLICT (source_table) DO UPDATE SET
+        last_id = EXCLUDED.last_id,
+        refreshed_at = CURRENT_TIMESTAMP
+    """, (source_table, max_id))
+
+    print(f"📈 {source_table}: counted rows {last_id + 1}..{max_id}, {len(changed)} codes updated")
+    return changed
+
+def apply_usage_counts(cursor, code_type, codes):
+    """Copy refreshed counts onto the code lookup tables used by search"""
+    if not codes:
+        return
+
+    for table_name in CODE_TABLES[code_type]:
+        cursor.execute("SELECT to_regclass(%s) AS oid", (table_name,))
+        if cursor.fetchone()['oid'] is None:
+            continue
+
+        # Stats hold one dotted row per code; lookup tables may store either form
+        cursor.execute(f"""
+            UPDATE {table_name} t SET usage_count = s.usage_count
+            FROM code_usage_stats s
+            WHERE s.code_type = %s AND s.code = ANY(%s)
+            AND REPLACE(s.code, '.', '') = REPLACE(t.code, '.', '')
+            AND t.usage_count IS DISTINCT FROM s.usage_count
+        """, (code_type, codes))
+        print(f"🔄 {table_name}: {cursor.rowcount} usage counts updated")
+
+def main():
+    parser = argparse.ArgumentParser(description='Refresh claims-driven code usage statistics')
+    parser.add_argument('--full', action='store_true', help='Discard existing counts and rescan every claim')
+    parser.add_argument('--lag-minutes', type=int, default=10,
+                        help='Leave rows created this recently for the next run, so in-flight inserts are not skipped')
+
+    args = parser.parse_args()
+
+    print("📊 Code Usage Statistics Refresh")
+    print("=" * 35)
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        print("✅ Connected to PostgreSQL database")
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+        return
+
+    try:
+        create_tables(cursor)
+        apply_usage_counts(cursor, 'diagnosis', consolidate_undotted_stats(cursor))
+
+        if args.full:
+            cursor.execute("TRUNCATE code_usage_stats")
+            cursor.execute("TRUNCATE code_usage_watermarks")
+            for tables in CODE_TABLES.values():
+                for table_name in tables:
+                    cursor.execute("SELECT to_regclass(%s) AS oid", (table_name,))
+                    if cursor.fetchone()['oid'] is not None:
+                        cursor.execute(f"UPDATE {table_name} SET usage_count = 0 WHERE usage_count <> 0")
+
+        for source_table, (code_type, query) in USAGE_SOURCES.items():
+            changed = refresh_source(cursor, source_table, code_type, query, args.full, args.lag_minutes)
+            apply_usage_counts(cursor, code_type, changed)
+
+        # Counts and watermarks move together or not at all
+        conn.commit()
+
+        cursor.execute("SELECT code_type, COUNT(*) AS codes, SUM(usage_count) AS uses FROM code_usage_stats GROUP BY code_type")
+        print("\n📊 Usage Summary:")
+        for row in cursor.fetchall():
+            print(f"   {row['code_type'].title()} codes: {row['codes']:,} ({row['uses']:,} uses)")
+
+        print("\n✅ Code usage statistics refreshed!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Refresh failed: {e}")
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -55,6 +55,18 @@ sleep 15
 print_info "Checking service health..."
 ./scripts/clean-containers.sh --health
 
+# Load medical codes from the prebuilt snapshot instead of re-parsing CMS XML,
+# but only into an empty database so later imports and usage counts survive.
+# Fresh clones fetch the published snapshot from CODE_SNAPSHOT_URL.
+SNAPSHOT_DIR="${CODE_SNAPSHOT_DIR:-snapshots}"
+CODE_SNAPSHOT_URL="${CODE_SNAPSHOT_URL:-$(grep -s '^CODE_SNAPSHOT_URL=' .env | cut -d= -f2-)}"
+export CODE_SNAPSHOT_URL
+if [ -f "$SNAPSHOT_DIR/LATEST" ] || [ -n "$CODE_SNAPSHOT_URL" ]; then
+    print_info "Checking medical codes snapshot..."
+    python3 snapshot_codes.py restore --snapshot-dir "$SNAPSHOT_DIR" --if-empty || \
+        print_warning "Snapshot restore failed; run ./compose-db.sh import to load medical codes"
+fi
+
 print_status ""
 print_status "Development environment started successfully!"
 print_status "Frontend: https://localhost"
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Claim Line Item Scrubber
+Streams claim line items grouped by claim and flags procedure pairs that a
+procedure-to-procedure edit bundles, using the pairs from import_ncci_edits.py.
+"""
+
+import sys
+import psycopg2
+from psycopg2.extras import RealDictCursor, execute_values
+import argparse
+from itertools import groupby
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'claims_db',
+    'user': 'claims_user',
+    'password': 'claims_password',
+    'port': 5432
+}
+
+def create_tables(cursor):
+    """Create the scrubber results table"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS claim_line_edits (
+            claim_id INTEGER NOT NULL REFERENCES claims(id),
+            column1_line INTEGER NOT NULL,
+            column2_line INTEGER NOT NULL,
+            column1_code VARCHAR(20) NOT NULL,
+            column2_code VARCHAR(20) NOT NULL,
+            modifier_indicator CHAR(1) NOT NULL,
+            detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (claim_id, column1_line, column2_line)
+        );
+    """)
+
+def load_edit_index(cursor, since_claim_id):
+    """Edit pairs keyed by (column 1, column 2), limited to codes that appear on claims"""
+    cursor.execute("""
+        SELECT ARRAY_AGG(DISTINCT UPPER(TRIM(procedure_code))) AS codes
+        FROM claim_line_items WHERE claim_id > %s
+    """, (since_claim_id,))
+    codes = cursor.fetchone()['codes'] or []
+
+    cursor.execute("""
+        SELECT column1_code, column2_code, effective_date, deletion_date, modifier_indicator
+        FROM procedure_edit_pairs
+        WHERE column1_code = ANY(%s) AND column2_code = ANY(%s)
+    """, (codes, codes))
+
+    edits = {}
+    for row in cursor.fetchall():
+        edits.setdefault((row['column1_code'], row['column2_code']), []).append(
+            (row['effective_date'], row['deletion_date'], row['modifier_indicator'])
+        )
+
+    print(f"📚 Loaded {len(edits):,} edit pairs for {len(codes):,} billed procedure codes")
+    return edits
+
+def active_edit(edits, column1_code, column2_code, service_date):
+    """Modifier indicator of the edit in force on the service date, if any"""
+    for effective_date, deletion_date, modifier_indicator in edits.get((column1_code, column2_code), ()):
+        if effective_date <= service_date and (deletion_date is None or service_date < deletion_date):
+            return modifier_indicator
+    return None
+
+def scrub_claim(claim_id, lines, edits):
+    """Bundled line pairs on one claim; edits only apply within the same date of service"""
+    flagged = []
+    for line1, code1, date1 in lines:
+        for line2, code2, date2 in lines:
+            if line1 == line2 or code1 == code2 or date1 != date2:
+                continue
+            modifier_indicator = active_edit(edits, code1, code2, date1)
+            if modifier_indicator is not None:
+                flagged.append((claim_id, line1, line2, code1, code2, modifier_indicator))
+    return flagged
+
+def clear_edits(cursor, since_claim_id):
+    """Drop earlier flags for the claims being rescanned so corrected lines and new edit files take effect"""
+    cursor.execute("DELETE FROM claim_line_edits WHERE claim_id > %s", (since_claim_id,))
+    return cursor.rowcount
+
+def write_edits(cursor, rows):
+    if not rows:
+        return 0
+    execute_values(cursor, """
+        INSERT INTO claim_line_edits
+        (claim_id, column1_line, column2_line, column1_code, column2_code, modifier_indicator)
+        VALUES %s ON CONFLICT DO NOTHING
+    """, rows)
+    return cursor.rowcount
+
+def main():
+    parser = argparse.ArgumentParser(description='Flag bundled procedure pairs on claim line items')
+    parser.add_argument('--since-claim-id', type=int, default=0, help='Only scrub claims with a higher id')
+    parser.add_argument('--batch-size', type=int, default=50000, help='Line items fetched per round trip')
+
+    args = parser.parse_args()
+
+    print("🧹 Claim Line Item Scrubber")
+    print("=" * 35)
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        print("✅ Connected to PostgreSQL database")
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+        sys.exit(1)
+
+    try:
+        create_tables(cursor)
+        edits = load_edit_index(cursor, args.since_claim_id)
+        # Same transaction as the new flags, which replace these on commit
+        cleared = clear_edits(cursor, args.since_claim_id)
+
+        # Server-side cursor so the full backlog is never held in memory
+        scan = conn.cursor(name='claim_line_item_scan')
+        scan.itersize = args.batch_size
+        scan.execute("""
+            SELECT claim_id, line_number, UPPER(TRIM(procedure_code)), service_date
+            FROM claim_line_items
+            WHERE claim_id > %s
+            ORDER BY claim_id, line_number
+        """, (args.since_claim_id,))
+
+        claims = 0
+        flagged = 0
+        pending = []
+        for claim_id, rows in groupby(scan, key=lambda row: row[0]):
+            claims += 1
+            lines = [(line_number, code, service_date) for _, line_number, code, service_date in rows]
+            if len(lines) > 1:
+                pending.extend(scrub_claim(claim_id, lines, edits))
+
+            if len(pending) >= args.batch_size:
+                flagged += write_edits(cursor, pending)
+                pending = []
+        flagged += write_edits(cursor, pending)
+        scan.close()
+        conn.commit()
+
+        print("\n📊 Scrub Summary:")
+        print(f"   Claims scanned: {claims:,}")
+        print(f"   Bundled line pairs flagged: {flagged:,} (replacing {cleared:,})")
+        print("\n✅ Scrub completed!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Scrub failed: {e}")
+        sys.exit(1)
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
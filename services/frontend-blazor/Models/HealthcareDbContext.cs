@@ -18,6 +18,7 @@ public class HealthcareDbContext : DbContext
     public DbSet<ClaimDocument> ClaimDocuments { get; set; }
     public DbSet<DiagnosisCode> DiagnosisCodes { get; set; }
     public DbSet<ProcedureCode> ProcedureCodes { get; set; }
+    public DbSet<DiagnosisTerm> DiagnosisTerms { get; set; }
 
     protected override void OnModelCreating(ModelBuilder modelBuilder)
     {
@@ -32,6 +33,10 @@ public class HealthcareDbContext : DbContext
         modelBuilder.Entity<Claim>().ToTable("claims");
         modelBuilder.Entity<ClaimDocument>().ToTable("claim_documents");
 
+        // Term index built by import_full_icd10.py
+        modelBuilder.Entity<DiagnosisTerm>()
+            .HasKey(t => new { t.Term, t.Code, t.Source });
+
         // Configure array properties
         modelBuilder.Entity<HealthcareProvider>()
             .Property(e => e.Specialties)
@@ -226,6 +231,15 @@ public class DiagnosisCode
     [Column("code")] public string Code { get; set; } = string.Empty;
     [Column("description")] public string Description { get; set; } = string.Empty;
     [Column("category")] public string? Category { get; set; }
+    [Column("usage_count")] public long UsageCount { get; set; }
+}
+
+[Table("icd10_term_index")]
+public class DiagnosisTerm
+{
+    [Column("term")] public string Term { get; set; } = string.Empty;
+    [Column("code")] public string Code { get; set; } = string.Empty;
+    [Column("source")] public string Source { get; set; } = string.Empty;
 }
 
 [Table("cpt_procedure_codes")]
@@ -235,4 +249,5 @@ public class ProcedureCode
     [Column("code")] public string Code { get; set; } = string.Empty;
     [Column("description")] public string Description { get; set; } = string.Empty;
     [Column("category")] public string? Category { get; set; }
+    [Column("usage_count")] public long UsageCount { get; set; }
 }
\ No newline at end of file
@@ -142,6 +142,18 @@ using (var scope = app.Services.CreateScope())
     try
     {
         await context.Database.EnsureCreatedAsync();
+
+        // Code search ranks by usage_count; add it to code tables loaded by older importers
+        await context.Database.ExecuteSqlRawAsync(@"
+            DO $$
+            BEGIN
+                IF to_regclass('icd10_diagnosis_codes') IS NOT NULL THEN
+                    ALTER TABLE icd10_diagnosis_codes ADD COLUMN IF NOT EXISTS usage_count BIGINT NOT NULL DEFAULT 0;
+                END IF;
+                IF to_regclass('cpt_procedure_codes') IS NOT NULL THEN
+                    ALTER TABLE cpt_procedure_codes ADD COLUMN IF NOT EXISTS usage_count BIGINT NOT NULL DEFAULT 0;
+                END IF;
+            END $$;");
         Console.WriteLine("Database connection verified successfully");
     }
     catch (Exception ex)
@@ -1,3 +1,4 @@
+using System.Text.RegularExpressions;
 using Microsoft.EntityFrameworkCore;
 using BlazorApp.Models;
 using BlazorApp.Models.DTOs;
@@ -631,10 +632,15 @@ public class MedicalCodesService : IMedicalCodesService
             if (string.IsNullOrWhiteSpace(searchTerm))
                 return new List<DiagnosisCodeDto>();
 
+            var termMatches = await SearchDiagnosisTermsAsync(searchTerm, limit);
+            if (termMatches.Count > 0)
+                return termMatches;
+
             var codes = await _context.DiagnosisCodes
                 .Where(d => d.Code.ToLower().Contains(searchTerm.ToLower()) || 
                             d.Description.ToLower().Contains(searchTerm.ToLower()))
-                .OrderBy(d => d.Code)
+                .OrderByDescending(d => d.UsageCount)
+                .ThenBy(d => d.Code)
                 .Take(limit)
                 .ToListAsync();
 
@@ -647,6 +653,46 @@ public class MedicalCodesService : IMedicalCodesService
         }
     }
 
+    // Exact match on the normalized term is a single primary key lookup in icd10_term_index;
+    // partially typed terms ("heart att") fall back to a LIKE 'term%' range on idx_icd10_term_prefix
+    private async Task<List<DiagnosisCodeDto>> SearchDiagnosisTermsAsync(string searchTerm, int limit)
+    {
+        var term = NormalizeTerm(searchTerm);
+        if (term.Length == 0)
+            return new List<DiagnosisCodeDto>();
+
+        try
+        {
+            var codes = await TermMatchCodesAsync(_context.DiagnosisTerms.Where(t => t.Term == term), limit);
+            if (codes.Count == 0 && term.Length >= MinTermPrefixLength)
+                codes = await TermMatchCodesAsync(_context.DiagnosisTerms.Where(t => t.Term.StartsWith(term)), limit);
+
+            return codes.Select(d => new DiagnosisCodeDto(d.Code, d.Description, d.Category)).ToList();
+        }
+        catch (Exception ex)
+        {
+            // Term index not built yet; fall back to description search
+            _logger.LogWarning(ex, "Term index lookup failed for: {SearchTerm}", searchTerm);
+            return new List<DiagnosisCodeDto>();
+        }
+    }
+
+    // Shorter prefixes match too much of the index to be worth the lookup
+    private const int MinTermPrefixLength = 3;
+
+    private Task<List<DiagnosisCode>> TermMatchCodesAsync(IQueryable<DiagnosisTerm> terms, int limit) =>
+        terms
+            .Join(_context.DiagnosisCodes, t => t.Code, d => d.Code, (t, d) => d)
+            .Distinct()
+            .OrderByDescending(d => d.UsageCount)
+            .ThenBy(d => d.Code)
+            .Take(limit)
+            .ToListAsync();
+
+    // Same normalization import_full_icd10.normalize_term applies when building the index
+    private static string NormalizeTerm(string text) =>
+        Regex.Replace(text.ToLowerInvariant(), "[^0-9a-z]+", " ").Trim();
+
     public async Task<List<ProcedureCodeDto>> SearchProcedureCodesAsync(string searchTerm, int limit = 10)
     {
         try
@@ -657,7 +703,8 @@ public class MedicalCodesService : IMedicalCodesService
             var codes = await _context.ProcedureCodes
                 .Where(p => p.Code.ToLower().Contains(searchTerm.ToLower()) || 
                             p.Description.ToLower().Contains(searchTerm.ToLower()))
-                .OrderBy(p => p.Code)
+                .OrderByDescending(p => p.UsageCount)
+                .ThenBy(p => p.Code)
                 .Take(limit)
                 .ToListAsync();
 
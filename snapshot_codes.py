@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Medical Code Snapshot Tool
+Saves the loaded code tables (with their indexes) as a versioned pg_dump
+custom-format archive plus manifest, and restores it with a parallel pg_restore.
+Snapshots can be published to and fetched from a shared location (a directory,
+file:// or http(s):// URL in CODE_SNAPSHOT_URL) so fresh environments skip the importers.
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+import subprocess
+import tempfile
+import argparse
+import urllib.request
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+DB_CONFIG = {
+    'host': 'localhost',
+    'database': 'claims_db',
+    'user': 'claims_user',
+    'password': 'claims_password',
+    'port': 5432
+}
+
+SNAPSHOT_DIR = os.environ.get('CODE_SNAPSHOT_DIR', './snapshots')
+# Shared location laid out like SNAPSHOT_DIR: LATEST plus <version>/manifest.json and dump
+SNAPSHOT_URL = os.environ.get('CODE_SNAPSHOT_URL')
+DB_SERVICE = 'postgres'
+DUMP_FILE = 'codes.dump'
+MANIFEST_FILE = 'manifest.json'
+
+# Tables produced by the importers; missing ones are skipped
+SNAPSHOT_TABLES = [
+    'icd10_diagnosis_codes',
+    'icd10_procedure_codes',
+    'cpt_procedure_codes',
+    'icd10_term_index',
+    'icd10_code_rules',
+    'icd10_code_hierarchy',
+    'procedure_edit_pairs',
+]
+
+def pg_env():
+    """Environment for the pg_dump / pg_restore client tools"""
+    env = dict(os.environ)
+    env['PGPASSWORD'] = DB_CONFIG['password']
+    return env
+
+def pg_client(client='auto'):
+    """
+    Where to run pg_dump / pg_restore: inside the compose postgres container like
+    compose-db.sh does, or with host client tools. None when neither is available.
+    """
+    docker = shutil.which('docker-compose') is not None and os.path.exists('docker-compose.yml')
+    host = shutil.which('pg_dump') is not None and shutil.which('pg_restore') is not None
+    if client == 'docker':
+        return 'docker' if docker else None
+    if client == 'host':
+        return 'host' if host else None
+    if docker:
+        return 'docker'
+    return 'host' if host else None
+
+def pg_command(client, tool, *args):
+    """Command line for a PostgreSQL client tool run on the host or in the container"""
+    if client == 'docker':
+        return ['docker-compose', 'exec', '-T', DB_SERVICE, tool,
+                '-U', DB_CONFIG['user'], '-d', DB_CONFIG['database'], *args]
+    return [tool, '-h', DB_CONFIG['host'], '-p', str(DB_CONFIG['port']),
+            '-U', DB_CONFIG['user'], '-d', DB_CONFIG['database'], *args]
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def table_counts(cursor, tables):
+    """Row counts for the tables that exist"""
+    counts = {}
+    for table_name in tables:
+        cursor.execute("SELECT to_regclass(%s) AS oid", (table_name,))
+        if cursor.fetchone()['oid'] is None:
+            continue
+        cursor.execute(f"SELECT COUNT(*) AS count FROM {table_name}")
+        counts[table_name] = cursor.fetchone()['count']
+    return counts
+
+def create_snapshot(cursor, snapshot_dir=SNAPSHOT_DIR, source=None, client='auto'):
+    """Dump the code tables into a new versioned snapshot directory"""
+    counts = table_counts(cursor, SNAPSHOT_TABLES)
+    if not counts:
+        print("⚠️  No code tables found, skipping snapshot")
+        return None
+
+    client = pg_client(client)
+    if client is None:
+        print("⚠️  Neither docker-compose nor pg_dump is available, skipping snapshot")
+        return None
+
+    created_at = datetime.now(timezone.utc)
+    staging_dir = os.path.join(snapshot_dir, f".tmp-{created_at.strftime('%Y%m%d%H%M%S%f')}")
+    os.makedirs(staging_dir)
+    dump_path = os.path.join(staging_dir, DUMP_FILE)
+
+    print(f"📦 Dumping {len(counts)} code tables...")
+    command = pg_command(client, 'pg_dump', '-Fc', '-Z', '6', '--no-owner', '--no-privileges')
+    for table_name in counts:
+        command += ['-t', table_name]
+    try:
+        # The archive streams over stdout so the same call works inside the container
+        with open(dump_path, 'wb') as f:
+            subprocess.run(command, env=pg_env(), stdout=f, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        print(f"❌ Snapshot dump failed: {e}")
+        return None
+
+    checksum = file_sha256(dump_path)
+    version = f"{created_at.strftime('%Y%m%d%H%M%S')}-{checksum[:12]}"
+    manifest = {
+        'version': version,
+        'created_at': created_at.isoformat(),
+        'source': source,
+        'format': 'pg_dump custom',
+        'dump_file': DUMP_FILE,
+        'sha256': checksum,
+        'tables': counts,
+    }
+    with open(os.path.join(staging_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    version_dir = os.path.join(snapshot_dir, version)
+    os.rename(staging_dir, version_dir)
+    with open(os.path.join(snapshot_dir, 'LATEST'), 'w') as f:
+        f.write(version + '\n')
+
+    print(f"✅ Snapshot {version} written to {version_dir}")
+    return version_dir
+
+def loaded_tables(tables):
+    """Tables from the list that already exist and hold rows"""
+    conn = psycopg2.connect(**DB_CONFIG)
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        return [table_name for table_name, count in table_counts(cursor, tables).items() if count]
+    finally:
+        cursor.close()
+        conn.close()
+
+def resolve_snapshot(snapshot_dir, version=None):
+    """Directory of the requested snapshot version, or the latest one"""
+    if version is None:
+        latest = os.path.join(snapshot_dir, 'LATEST')
+        if not os.path.exists(latest):
+            return None
+        with open(latest) as f:
+            version = f.read().strip()
+    version_dir = os.path.join(snapshot_dir, version)
+    return version_dir if os.path.isdir(version_dir) else None
+
+def restore_snapshot(version_dir, jobs, client='auto'):
+    """Restore a snapshot with a parallel pg_restore and verify row counts"""
+    with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    dump_path = os.path.join(version_dir, manifest['dump_file'])
+    if file_sha256(dump_path) != manifest['sha256']:
+        print(f"❌ Checksum mismatch for {dump_path}")
+        return False
+
+    client = pg_client(client)
+    if client is None:
+        print("❌ Neither docker-compose nor pg_restore is available")
+        return False
+
+    print(f"♻️  Restoring snapshot {manifest['version']} with {jobs} jobs...")
+    options = ['--clean', '--if-exists', '--no-owner', '--no-privileges', '-j', str(jobs)]
+    try:
+        if client == 'docker':
+            # Parallel restore needs a seekable file, so stage the archive in the container
+            script = (
+                'cat > /tmp/codes.dump && '
+                f'pg_restore -U {DB_CONFIG["user"]} -d {DB_CONFIG["database"]} {" ".join(options)} /tmp/codes.dump; '
+                'status=$?; rm -f /tmp/codes.dump; exit $status'
+            )
+            with open(dump_path, 'rb') as f:
+                subprocess.run(['docker-compose', 'exec', '-T', DB_SERVICE, 'sh', '-c', script],
+                               stdin=f, check=True)
+        else:
+            subprocess.run(pg_command(client, 'pg_restore', *options, dump_path), env=pg_env(), check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"❌ pg_restore failed: {e}")
+        return False
+
+    conn = psycopg2.connect(**DB_CONFIG)
+    cursor = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        counts = table_counts(cursor, manifest['tables'])
+    finally:
+        cursor.close()
+        conn.close()
+
+    ok = True
+    for table_name, expected in manifest['tables'].items():
+        actual = counts.get(table_name, 0)
+        status = "✅" if actual == expected else "❌"
+        print(f"   {status} {table_name}: {actual:,} rows (expected {expected:,})")
+        ok = ok and actual == expected
+    return ok
+
+def shared_dir(url):
+    """Directory behind a file:// URL or plain path; None for http(s) locations"""
+    parsed = urlparse(url)
+    if parsed.scheme in ('http', 'https'):
+        return None
+    return parsed.path if parsed.scheme == 'file' else url
+
+def download(url, name, path):
+    """Copy <url>/<name> to a local path"""
+    base = shared_dir(url)
+    if base is not None:
+        shutil.copyfile(os.path.join(base, name), path)
+        return
+    with urllib.request.urlopen(f"{url.rstrip('/')}/{name}") as response, open(path, 'wb') as f:
+        shutil.copyfileobj(response, f)
+
+def upload(url, name, path):
+    """Copy a local file to <url>/<name>; http(s) locations take a PUT"""
+    base = shared_dir(url)
+    if base is not None:
+        target = os.path.join(base, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(path, target)
+        return
+    with open(path, 'rb') as f:
+        request = urllib.request.Request(
+            f"{url.rstrip('/')}/{name}", data=f, method='PUT',
+            headers={'Content-Length': str(os.path.getsize(path)), 'Content-Type': 'application/octet-stream'}
+        )
+        urllib.request.urlopen(request).close()
+
+def publish_snapshot(version_dir, url):
+    """Upload a snapshot, then point the shared LATEST at it once the files are in place"""
+    with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    version = manifest['version']
+
+    print(f"📤 Publishing snapshot {version} to {url}...")
+    upload(url, f"{version}/{manifest['dump_file']}", os.path.join(version_dir, manifest['dump_file']))
+    upload(url, f"{version}/{MANIFEST_FILE}", os.path.join(version_dir, MANIFEST_FILE))
+    with tempfile.NamedTemporaryFile('w', suffix='.latest', delete=False) as f:
+        f.write(version + '\n')
+    try:
+        upload(url, 'LATEST', f.name)
+    finally:
+        os.unlink(f.name)
+    print(f"✅ Published snapshot {version}")
+
+def fetch_snapshot(url, snapshot_dir, version=None):
+    """Download a published snapshot into snapshot_dir unless it is already there"""
+    os.makedirs(snapshot_dir, exist_ok=True)
+    if version is None:
+        latest = os.path.join(snapshot_dir, '.LATEST.remote')
+        download(url, 'LATEST', latest)
+        with open(latest) as f:
+            version = f.read().strip()
+        os.unlink(latest)
+
+    version_dir = os.path.join(snapshot_dir, version)
+    if not os.path.exists(os.path.join(version_dir, MANIFEST_FILE)):
+        print(f"📥 Fetching snapshot {version} from {url}...")
+        staging_dir = os.path.join(snapshot_dir, f".tmp-fetch-{version}")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+        try:
+            download(url, f"{version}/{MANIFEST_FILE}", os.path.join(staging_dir, MANIFEST_FILE))
+            with open(os.path.join(staging_dir, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+            dump_path = os.path.join(staging_dir, manifest['dump_file'])
+            download(url, f"{version}/{manifest['dump_file']}", dump_path)
+            if file_sha256(dump_path) != manifest['sha256']:
+                raise ValueError(f"checksum mismatch for {version}/{manifest['dump_file']}")
+        except Exception:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        os.rename(staging_dir, version_dir)
+
+    with open(os.path.join(snapshot_dir, 'LATEST'), 'w') as f:
+        f.write(version + '\n')
+    return version_dir
+
+def main():
+    parser = argparse.ArgumentParser(description='Create or restore medical code table snapshots')
+    parser.add_argument('action', choices=['create', 'restore', 'list', 'publish', 'fetch'], help='Snapshot action')
+    parser.add_argument('--snapshot-dir', default=SNAPSHOT_DIR, help='Snapshot directory path')
+    parser.add_argument('--version', help='Snapshot version to restore, publish or fetch (default: latest)')
+    parser.add_argument('--url', default=SNAPSHOT_URL,
+                        help='Shared snapshot location: directory, file:// or http(s):// URL (default: $CODE_SNAPSHOT_URL)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 4, help='Parallel restore jobs')
+    parser.add_argument('--client', choices=['auto', 'docker', 'host'], default='auto',
+                        help='Run pg_dump/pg_restore in the postgres container or on the host')
+    parser.add_argument('--if-empty', action='store_true',
+                        help='Only restore when the snapshot tables are missing or empty')
+
+    args = parser.parse_args()
+
+    print("🗄️  Medical Code Snapshot Tool")
+    print("=" * 35)
+
+    if args.action == 'list':
+        if not os.path.isdir(args.snapshot_dir):
+            print("No snapshots found")
+            return
+        for version in sorted(os.listdir(args.snapshot_dir)):
+            manifest_path = os.path.join(args.snapshot_dir, version, MANIFEST_FILE)
+            if os.path.exists(manifest_path):
+                with open(manifest_path) as f:
+                    manifest = json.load(f)
+                total = sum(manifest['tables'].values())
+                print(f"   {manifest['version']}  {total:,} rows  ({manifest.get('source') or 'manual'})")
+        return
+
+    if args.action in ('publish', 'fetch') and not args.url:
+        print("❌ No shared snapshot location; pass --url or set CODE_SNAPSHOT_URL")
+        sys.exit(1)
+
+    if args.action == 'publish':
+        version_dir = resolve_snapshot(args.snapshot_dir, args.version)
+        if version_dir is None:
+            print("❌ No snapshot found to publish")
+            sys.exit(1)
+        try:
+            publish_snapshot(version_dir, args.url)
+        except Exception as e:
+            print(f"❌ Snapshot publish failed: {e}")
+            sys.exit(1)
+        return
+
+    if args.action == 'fetch':
+        try:
+            version_dir = fetch_snapshot(args.url, args.snapshot_dir, args.version)
+        except Exception as e:
+            print(f"❌ Snapshot fetch failed: {e}")
+            sys.exit(1)
+        print(f"✅ Snapshot available at {version_dir}")
+        return
+
+    if args.action == 'restore':
+        version_dir = resolve_snapshot(args.snapshot_dir, args.version)
+        if version_dir is None and args.url:
+            # Fresh clones and CI have no local snapshot; use the published one
+            try:
+                version_dir = fetch_snapshot(args.url, args.snapshot_dir, args.version)
+            except Exception as e:
+                print(f"⚠️  Snapshot fetch failed: {e}")
+        if version_dir is None:
+            print("❌ No snapshot found to restore")
+            sys.exit(1)
+        if args.if_empty:
+            with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+                populated = loaded_tables(json.load(f)['tables'])
+            if populated:
+                # --clean would drop later imports and refreshed usage counts
+                print(f"⏭️  Code tables already loaded ({', '.join(populated)}), skipping restore")
+                return
+        if not restore_snapshot(version_dir, args.jobs, args.client):
+            print("❌ Snapshot restore failed verification")
+            sys.exit(1)
+        print("\n✅ Snapshot restored successfully!")
+        return
+
+    try:
+        conn = psycopg2.connect(**DB_CONFIG)
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        print("✅ Connected to PostgreSQL database")
+    except Exception as e:
+        print(f"❌ Database connection failed: {e}")
+        sys.exit(1)
+
+    try:
+        if create_snapshot(cursor, args.snapshot_dir, source='manual', client=args.client) is None:
+            sys.exit(1)
+    finally:
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()